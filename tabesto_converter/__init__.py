@@ -0,0 +1,65 @@
+"""Headless Tabesto → Deliverect menu conversion engine."""
+
+from .browser import ResultBrowser
+from .cache import CachedConversion, ResultCache, content_key, run_conversion
+from .compression import open_input, open_output
+from .delta import Delta, TemplateLayoutError, compute_delta, delta_from_exports, delta_from_tsv, write_delta
+from .engine import (
+    CATEGORY_POLICIES,
+    ConversionResult,
+    MenuIndex,
+    convert,
+    load_exports,
+)
+from .image_index import ImageIndex, open_image_index, read_exports
+from .ingest import stream_exports
+from .instrumentation import ConversionReport
+from .languages import DEFAULT_LANGUAGE_CONFIG, LanguageConfig
+from .locations import Location, read_locations, write_location_tsvs
+from .plu import PLU_PREFIXES, PluResolver
+from .rows import COMMON_FIELDS, OUTPUT_HEADERS, Row
+from .validation import ValidationError, ValidationReport, validate_rows
+from .writer import OUTPUT_FILE_NAME, iter_tsv_lines, write_tsv, write_tsv_file
+
+__all__ = [
+    'CATEGORY_POLICIES',
+    'COMMON_FIELDS',
+    'CachedConversion',
+    'ConversionReport',
+    'ConversionResult',
+    'DEFAULT_LANGUAGE_CONFIG',
+    'Delta',
+    'ImageIndex',
+    'LanguageConfig',
+    'Location',
+    'MenuIndex',
+    'OUTPUT_FILE_NAME',
+    'OUTPUT_HEADERS',
+    'PLU_PREFIXES',
+    'PluResolver',
+    'ResultBrowser',
+    'ResultCache',
+    'Row',
+    'TemplateLayoutError',
+    'ValidationError',
+    'ValidationReport',
+    'compute_delta',
+    'content_key',
+    'convert',
+    'delta_from_exports',
+    'delta_from_tsv',
+    'iter_tsv_lines',
+    'load_exports',
+    'open_image_index',
+    'open_input',
+    'open_output',
+    'read_exports',
+    'read_locations',
+    'run_conversion',
+    'stream_exports',
+    'validate_rows',
+    'write_delta',
+    'write_location_tsvs',
+    'write_tsv',
+    'write_tsv_file',
+]
@@ -0,0 +1,259 @@
+import argparse
+import os
+import sys
+
+from . import benchmark, equivalence
+from .batch import discover_sites, format_summary, read_manifest, run_batch
+from .compression import open_input
+from .delta import REMOVED_PLUS_FILE_NAME, TemplateLayoutError, delta_from_exports, delta_from_tsv, write_delta
+from .engine import CATEGORY_POLICIES, convert
+from .image_index import read_exports
+from .languages import DEFAULT_LANGUAGE, DEFAULT_LANGUAGES, LanguageConfig
+from .locations import read_locations, write_location_tsvs
+from .synthetic import generate_menu_bytes
+from .validation import ISSUE_LABELS, VALIDATION_MODES, ValidationError
+from .writer import OUTPUT_FILE_NAME, write_tsv_file
+
+
+STREAMING_HELP = 'parse exports incrementally and keep only the fields the converter uses (lower memory)'
+COMPRESSED_HELP = ' (may be gzip or zip compressed)'
+IMAGE_CACHE_HELP = 'directory of compiled IMAGE EXPORT indexes, reused while the export is unchanged'
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m tabesto_converter',
+        description='Convert Tabesto PRODUCT/IMAGE exports into Deliverect import templates.',
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    single = subparsers.add_parser('convert', help='convert one site')
+    single.add_argument('--product', required=True, help=f'PRODUCT EXPORT json{COMPRESSED_HELP}')
+    single.add_argument('--image', required=True, help=f'IMAGE EXPORT json{COMPRESSED_HELP}')
+    single.add_argument('--output', default=OUTPUT_FILE_NAME,
+                        help=f'TSV to write, compressed when it ends in .gz or .zip (default: {OUTPUT_FILE_NAME})')
+    single.add_argument('--report', help='write per-stage timings as JSON to this file')
+    single.add_argument('--streaming', action='store_true', help=STREAMING_HELP)
+    single.add_argument('--image-cache', metavar='DIR', help=IMAGE_CACHE_HELP)
+    single.add_argument('--validation-report', help='write the validation issues as JSON to this file')
+    add_convert_arguments(single)
+
+    batch = subparsers.add_parser('batch', help='convert many sites at once')
+    source = batch.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input-dir', help='directory with one sub-directory of exports per site')
+    source.add_argument('--manifest', help='CSV file with site,product,image columns')
+    batch.add_argument('--output-dir', required=True, help='where per-site TSVs and summary.json are written')
+    batch.add_argument('--workers', type=int, default=None, help='number of worker processes (default: CPU count)')
+    batch.add_argument('--streaming', action='store_true', help=STREAMING_HELP)
+    batch.add_argument('--image-cache', metavar='DIR', help=IMAGE_CACHE_HELP)
+    batch.add_argument('--archive', help='also pack every site template into this zip file')
+    add_convert_arguments(batch)
+
+    delta = subparsers.add_parser('delta', help='only the rows that changed since a previous export')
+    previous = delta.add_mutually_exclusive_group(required=True)
+    previous.add_argument('--previous-tsv', help='template generated from the previous export')
+    previous.add_argument('--previous-product', help='previous PRODUCT EXPORT json (with --previous-image)')
+    delta.add_argument('--previous-image', help='previous IMAGE EXPORT json')
+    delta.add_argument('--product', required=True, help='current PRODUCT EXPORT json')
+    delta.add_argument('--image', required=True, help='current IMAGE EXPORT json')
+    delta.add_argument('--output-dir', required=True, help=f'where {OUTPUT_FILE_NAME} and {REMOVED_PLUS_FILE_NAME} are written')
+    add_convert_arguments(delta)
+
+    locations = subparsers.add_parser('locations', help='one template per location from a single conversion')
+    locations.add_argument('--product', required=True, help='PRODUCT EXPORT json')
+    locations.add_argument('--image', required=True, help='IMAGE EXPORT json')
+    locations.add_argument('--locations', required=True,
+                           help='CSV file with id,name and optional delivery_tax,takeaway_tax,eat_in_tax columns')
+    locations.add_argument('--prices', help='CSV file with location,plu,price columns overriding prices')
+    locations.add_argument('--output-dir', required=True, help=f'where <location id>/{OUTPUT_FILE_NAME} is written')
+    locations.add_argument('--streaming', action='store_true', help=STREAMING_HELP)
+    add_convert_arguments(locations)
+
+    generate = subparsers.add_parser('generate', help='write a synthetic PRODUCT/IMAGE export pair')
+    generate.add_argument('--products', type=int, default=1000, help='number of products (default: 1000)')
+    generate.add_argument('--seed', type=int, default=0)
+    generate.add_argument('--output-dir', required=True)
+
+    bench = subparsers.add_parser('bench', help='benchmark the converter on synthetic menus')
+    bench.add_argument('--sizes', default=','.join(str(size) for size in benchmark.DEFAULT_SIZES),
+                       help='comma separated product counts (default: 1000,10000,100000)')
+    bench.add_argument('--repeat', type=int, default=3, help='runs per size, the fastest is kept (default: 3)')
+    bench.add_argument('--seed', type=int, default=0)
+    bench.add_argument('--jobs', type=int, default=None,
+                       help='processes used to build the rows, to measure the pool against the default (default: 1)')
+    bench.add_argument('--output', help='write the results as JSON to this file')
+    bench.add_argument('--compare', help='previous results JSON to compare against')
+
+    check = subparsers.add_parser('equivalence', help='compare the engine with the original conversion')
+    check.add_argument('--sizes', default=','.join(str(size) for size in equivalence.DEFAULT_SIZES),
+                       help='comma separated synthetic menu sizes (default: 100,1000,3000)')
+    check.add_argument('--seed', type=int, default=0)
+    check.add_argument('--input-dir', help='also compare recorded exports, one sub-directory per site')
+    check.add_argument('--output', help='write the results as JSON to this file')
+    return parser
+
+
+def add_convert_arguments(parser):
+    parser.add_argument('--category-policy', choices=CATEGORY_POLICIES, default='first',
+                        help='category for products listed in several categories (default: first)')
+    parser.add_argument('--languages', default=','.join(DEFAULT_LANGUAGES),
+                        help=f"comma separated languages that get their own Name/Description column (default: {','.join(DEFAULT_LANGUAGES)})")
+    parser.add_argument('--default-language', default=DEFAULT_LANGUAGE,
+                        help=f'language of the plain Name/Description columns (default: {DEFAULT_LANGUAGE})')
+    parser.add_argument('--fallback-language', default=None,
+                        help='language used when a text is missing in another language (default: leave blank)')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='processes used to build the rows of one menu; measure first, the pool '
+                             'has been slower than the default on every menu tried (default: 1)')
+    parser.add_argument('--validation', choices=VALIDATION_MODES, default='off',
+                        help='check subproduct references; strict stops before writing any output (default: off)')
+
+
+def convert_options_from_args(args):
+    languages = LanguageConfig(
+        [language.strip() for language in args.languages.split(',') if language.strip()],
+        default=args.default_language,
+        fallback=args.fallback_language,
+    )
+    return {
+        'category_policy': args.category_policy,
+        'languages': languages,
+        'workers': args.jobs,
+        'validation': args.validation,
+    }
+
+
+def print_validation(validation):
+    for kind, count in validation.counts().items():
+        print(f"{ISSUE_LABELS[kind]:<28} {count:>9}")
+
+
+def run_convert(args):
+    product_export_data, image_export_data, image_urls = read_exports(
+        args.product, args.image, args.streaming, args.image_cache,
+    )
+    try:
+        result = convert(product_export_data, image_export_data, image_urls=image_urls,
+                         **convert_options_from_args(args))
+    except ValidationError as e:
+        print_validation(e.report)
+        if args.validation_report:
+            with open(args.validation_report, 'w', encoding='utf-8') as fp:
+                fp.write(e.report.to_json(indent=2))
+        print(f"{e}; nothing written to {args.output}", file=sys.stderr)
+        return 1
+    finally:
+        if image_urls is not None:
+            image_urls.close()
+    with result.report.stage('output') as timing:
+        write_tsv_file(result.rows, args.output, languages=result.languages)
+        timing.rows = len(result.rows)
+
+    for stage in result.report.stages:
+        print(f"{stage.label:<28} {stage.seconds:>9.4f}s {stage.rows:>9} rows {stage.lookups:>9} lookups")
+    print(f"{len(result.rows)} rows written to {args.output} in {result.report.seconds:.3f}s")
+    if result.validation is not None:
+        print_validation(result.validation)
+        if args.validation_report:
+            with open(args.validation_report, 'w', encoding='utf-8') as fp:
+                fp.write(result.validation.to_json(indent=2))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as fp:
+            fp.write(result.report.to_json(indent=2))
+    return 0
+
+
+def run_locations(args):
+    with open(args.locations, newline='', encoding='utf-8-sig') as locations_file:
+        if args.prices:
+            with open(args.prices, newline='', encoding='utf-8-sig') as prices_file:
+                locations = read_locations(locations_file, prices_file)
+        else:
+            locations = read_locations(locations_file)
+
+    product_export_data, image_export_data, _ = read_exports(args.product, args.image, args.streaming)
+    result = convert(product_export_data, image_export_data, **convert_options_from_args(args))
+    with result.report.stage('output') as timing:
+        paths = write_location_tsvs(result.rows, locations, args.output_dir, languages=result.languages)
+        timing.rows = len(result.rows) * len(locations)
+
+    for path in paths:
+        print(path)
+    print(f"{len(result.rows)} rows written for {len(locations)} locations in {result.report.seconds:.3f}s")
+    return 0
+
+
+def run_delta(args):
+    convert_options = convert_options_from_args(args)
+    with open_input(args.product) as product_file, open_input(args.image) as image_file:
+        if args.previous_tsv:
+            with open_input(args.previous_tsv) as previous_tsv:
+                try:
+                    delta = delta_from_tsv(previous_tsv, product_file, image_file, **convert_options)
+                except TemplateLayoutError as e:
+                    raise SystemExit(f'{args.previous_tsv}: {e}')
+        else:
+            if not args.previous_image:
+                raise SystemExit('--previous-product needs --previous-image')
+            with open_input(args.previous_product) as previous_product, open_input(args.previous_image) as previous_image:
+                delta = delta_from_exports(previous_product, previous_image, product_file, image_file, **convert_options)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, OUTPUT_FILE_NAME), 'wb') as tsv_fp, \
+            open(os.path.join(args.output_dir, REMOVED_PLUS_FILE_NAME), 'wb') as removed_fp:
+        write_delta(delta, tsv_fp, removed_fp)
+
+    summary = delta.summary()
+    print(f"{len(delta.rows)} rows to import: {summary['added']} new and {summary['changed']} changed PLUs, "
+          f"{summary['removed']} removed, {summary['unchanged']} unchanged")
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == 'convert':
+        return run_convert(args)
+    if args.command == 'batch':
+        sites = read_manifest(args.manifest) if args.manifest else discover_sites(args.input_dir)
+        try:
+            summary = run_batch(sites, args.output_dir, workers=args.workers,
+                                convert_options=convert_options_from_args(args), streaming=args.streaming,
+                                image_cache=args.image_cache, archive=args.archive)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        print(format_summary(summary))
+        return 1 if summary['failed'] else 0
+    if args.command == 'delta':
+        return run_delta(args)
+    if args.command == 'locations':
+        return run_locations(args)
+    if args.command == 'generate':
+        product_bytes, image_bytes = generate_menu_bytes(args.products, args.seed)
+        os.makedirs(args.output_dir, exist_ok=True)
+        for file_name, data in (('PRODUCT EXPORT.json', product_bytes), ('IMAGE EXPORT.json', image_bytes)):
+            with open(os.path.join(args.output_dir, file_name), 'wb') as fp:
+                fp.write(data)
+        return 0
+    if args.command == 'bench':
+        sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+        report = benchmark.run_benchmark(sizes, repeat=args.repeat, seed=args.seed, workers=args.jobs)
+        print('\n'.join(benchmark.format_report(report)))
+        if args.compare:
+            print('\n'.join(benchmark.compare(report, benchmark.load_report(args.compare))))
+        if args.output:
+            benchmark.save_report(report, args.output)
+        return 0
+    if args.command == 'equivalence':
+        sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+        sites = discover_sites(args.input_dir) if args.input_dir else ()
+        report = equivalence.run_equivalence(sizes, seed=args.seed, sites=sites)
+        print('\n'.join(equivalence.format_equivalence(report)))
+        if args.output:
+            equivalence.save_report(report, args.output)
+        return 0 if report['identical'] else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
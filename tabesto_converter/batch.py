@@ -0,0 +1,175 @@
+import csv
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from .compression import EXPORT_SUFFIXES, write_archive
+from .engine import convert
+from .image_index import read_exports
+from .writer import OUTPUT_FILE_NAME, directory_name, write_tsv_file
+
+SUMMARY_FILE_NAME = 'summary.json'
+
+
+class Site:
+    """One restaurant to convert: a PRODUCT EXPORT / IMAGE EXPORT pair."""
+
+    def __init__(self, name, product_path, image_path):
+        self.name = name
+        self.product_path = product_path
+        self.image_path = image_path
+
+    @property
+    def directory_name(self):
+        # Site names come from manifests and end up as directory names
+        return directory_name(self.name)
+
+
+def _find_export(directory, keyword):
+    for file_name in sorted(os.listdir(directory)):
+        if keyword in file_name.upper() and file_name.lower().endswith(EXPORT_SUFFIXES):
+            return os.path.join(directory, file_name)
+    return None
+
+
+def discover_sites(input_dir):
+    """Find one site per sub-directory holding a PRODUCT and an IMAGE export.
+
+    Sub-directories missing one of the two files are still returned (with
+    ``None`` for the missing path) so they show up as failures in the summary.
+    """
+    sites = []
+    for entry in sorted(os.listdir(input_dir)):
+        site_dir = os.path.join(input_dir, entry)
+        if os.path.isdir(site_dir):
+            sites.append(Site(entry, _find_export(site_dir, 'PRODUCT'), _find_export(site_dir, 'IMAGE')))
+    return sites
+
+
+def read_manifest(manifest_path):
+    """Read a CSV manifest with ``site,product,image`` columns.
+
+    Relative paths are resolved against the manifest's directory.
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    sites = []
+    with open(manifest_path, newline='', encoding='utf-8-sig') as manifest:
+        for record in csv.DictReader(manifest):
+            sites.append(Site(
+                record['site'],
+                os.path.join(base_dir, record['product']),
+                os.path.join(base_dir, record['image']),
+            ))
+    return sites
+
+
+def convert_site(site, output_dir, convert_options=None, streaming=False, image_cache=None):
+    """Convert one site and write its TSV. Never raises; failures are reported.
+
+    ``convert_options`` are passed as keyword arguments to :func:`convert`.
+    With ``streaming`` the exports are read with :func:`stream_exports`.
+    With an ``image_cache`` directory the IMAGE EXPORT is looked up in a
+    persistent index there (see :mod:`tabesto_converter.image_index`)
+    instead of being parsed, so sites sharing an image library compile it once.
+    """
+    started = time.perf_counter()
+    report = {'site': site.name, 'status': 'ok'}
+    try:
+        if not site.product_path or not site.image_path:
+            raise FileNotFoundError('PRODUCT EXPORT or IMAGE EXPORT json not found')
+
+        product_export_data, image_export_data, image_urls = read_exports(
+            site.product_path, site.image_path, streaming, image_cache,
+        )
+        try:
+            result = convert(product_export_data, image_export_data, image_urls=image_urls,
+                             **(convert_options or {}))
+        finally:
+            if image_urls is not None:
+                image_urls.close()
+
+        site_dir = os.path.join(output_dir, site.directory_name)
+        os.makedirs(site_dir, exist_ok=True)
+        output_path = os.path.join(site_dir, OUTPUT_FILE_NAME)
+        with result.report.stage('output') as timing:
+            write_tsv_file(result.rows, output_path, languages=result.languages)
+            timing.rows = len(result.rows)
+
+        report['output'] = output_path
+        report['rows'] = len(result.rows)
+        report['bundles'] = result.count('BUNDLE')
+        report['products'] = result.count('PRODUCT')
+        report['timings'] = result.report.to_dict()
+        if result.validation is not None:
+            report['validation'] = result.validation.counts()
+    except Exception as e:
+        report['status'] = 'error'
+        report['error'] = f"{type(e).__name__}: {e}"
+        report['traceback'] = traceback.format_exc()
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def run_batch(sites, output_dir, workers=None, convert_options=None, streaming=False, image_cache=None,
+              archive=None):
+    """Convert ``sites`` across a process pool and write ``summary.json``.
+
+    With ``archive``, the templates of the converted sites are also packed
+    into that zip file as ``<site directory>/TAB_DLV_IMPORT_OUTPUT.tsv``.
+    Returns the summary dict; per-site reports keep the input order.
+    Raises ``ValueError`` before converting anything when two sites would
+    write to the same directory.
+    """
+    directories = {}
+    for site in sites:
+        directories.setdefault(site.directory_name, []).append(site.name)
+    duplicates = [names for names in directories.values() if len(names) > 1]
+    if duplicates:
+        clashes = '; '.join(', '.join(map(repr, names)) for names in duplicates)
+        raise ValueError(f'Site names must be unique (after making them safe directory names): {clashes}')
+
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.perf_counter()
+
+    if workers == 1:
+        reports = [convert_site(site, output_dir, convert_options, streaming, image_cache) for site in sites]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            reports = list(pool.map(
+                convert_site, sites, [output_dir] * len(sites), [convert_options] * len(sites),
+                [streaming] * len(sites), [image_cache] * len(sites),
+            ))
+
+    summary = {
+        'sites': len(reports),
+        'succeeded': sum(1 for r in reports if r['status'] == 'ok'),
+        'failed': sum(1 for r in reports if r['status'] != 'ok'),
+        'rows': sum(r.get('rows', 0) for r in reports),
+        'seconds': round(time.perf_counter() - started, 3),
+        'results': reports,
+    }
+    if archive:
+        write_archive(
+            [(os.path.relpath(r['output'], output_dir), r['output']) for r in reports if r['status'] == 'ok'],
+            archive,
+        )
+        summary['archive'] = archive
+    with open(os.path.join(output_dir, SUMMARY_FILE_NAME), 'w', encoding='utf-8') as fp:
+        json.dump(summary, fp, indent=2, ensure_ascii=False)
+    return summary
+
+
+def format_summary(summary):
+    lines = []
+    for report in summary['results']:
+        if report['status'] == 'ok':
+            lines.append(f"✅ {report['site']}: {report['rows']} rows in {report['seconds']}s")
+        else:
+            lines.append(f"❌ {report['site']}: {report['error']}")
+    lines.append(
+        f"{summary['succeeded']}/{summary['sites']} sites converted, "
+        f"{summary['rows']} rows in {summary['seconds']}s"
+    )
+    return '\n'.join(lines)
@@ -0,0 +1,151 @@
+"""Benchmark harness for the converter.
+
+Each size runs in a fresh worker process so that peak RSS is measured per
+size. The menu is generated in the parent process and handed over as
+bytes, so the generator's own memory never shows up in the worker's peak.
+Results are written as JSON so two runs can be compared.
+"""
+
+import io
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from .engine import convert, load_exports
+from .synthetic import generate_menu_bytes
+from .writer import write_tsv
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def _peak_rss_mb():
+    # On Linux ru_maxrss carries the parent's peak over fork+exec, VmHWM is this process's own
+    try:
+        with open('/proc/self/status', encoding='ascii') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        # Windows: no portable way to read the peak without extra dependencies
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_once(product_bytes, image_bytes, workers=None):
+    """Time one end-to-end conversion of an export pair.
+
+    ``start_rss_mb`` is the peak RSS before the conversion starts (the
+    interpreter and the input bytes); ``conversion_rss_mb`` is how much
+    the conversion added on top of it. ``workers`` is passed to :func:`convert`.
+    """
+    start_rss_mb = _peak_rss_mb()
+    started = time.perf_counter()
+    product_export_data, image_export_data = load_exports(io.BytesIO(product_bytes), io.BytesIO(image_bytes))
+    timings = {'load': time.perf_counter() - started}
+
+    result = convert(product_export_data, image_export_data, workers=workers)
+    with result.report.stage('output') as timing:
+        tsv_buffer = io.BytesIO()
+        write_tsv(result.rows, tsv_buffer, languages=result.languages)
+        timing.rows = len(result.rows)
+    total = time.perf_counter() - started
+    for stage in result.report.stages:
+        timings[stage.name] = stage.seconds
+
+    peak_rss_mb = _peak_rss_mb()
+    return {
+        'input_bytes': len(product_bytes) + len(image_bytes),
+        'rows': len(result.rows),
+        'output_bytes': tsv_buffer.tell(),
+        'seconds': total,
+        'rows_per_second': len(result.rows) / total if total else 0.0,
+        'steps': timings,
+        'peak_rss_mb': peak_rss_mb,
+        'start_rss_mb': start_rss_mb,
+        'conversion_rss_mb': None if peak_rss_mb is None else round(peak_rss_mb - start_rss_mb, 1),
+    }
+
+
+def _best_of(runs):
+    # Keep the fastest run; peak RSS is the worst seen
+    best = dict(min(runs, key=lambda run: run['seconds']))
+    for key in ('peak_rss_mb', 'conversion_rss_mb'):
+        measured = [run[key] for run in runs if run[key] is not None]
+        best[key] = max(measured) if measured else None
+    best['repeat'] = len(runs)
+    return best
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, repeat=3, seed=0, workers=None):
+    results = []
+    for products in sizes:
+        product_bytes, image_bytes = generate_menu_bytes(products, seed)
+        runs = []
+        for _ in range(repeat):
+            # A fresh process per run keeps ru_maxrss specific to this size
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+                runs.append(pool.submit(run_once, product_bytes, image_bytes, workers).result())
+        result = {'products': products, 'seed': seed, 'workers': workers or 1}
+        result.update(_best_of(runs))
+        results.append(result)
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(current, baseline):
+    """Lines comparing two benchmark reports size by size (ratio > 1 is slower)."""
+    baseline_by_size = {result['products']: result for result in baseline['results']}
+    lines = []
+    for result in current['results']:
+        previous = baseline_by_size.get(result['products'])
+        if not previous:
+            continue
+        line = f"{result['products']:>8} products: {result['seconds'] / previous['seconds']:.2f}x time"
+        for key, label in (('peak_rss_mb', 'peak RSS'), ('conversion_rss_mb', 'conversion RSS')):
+            if result.get(key) is not None and previous.get(key):
+                line += f", {result[key] / previous[key]:.2f}x {label}"
+        lines.append(line)
+        for step, seconds in result['steps'].items():
+            previous_seconds = previous['steps'].get(step)
+            if previous_seconds:
+                lines.append(f"{'':>12}{step}: {seconds / previous_seconds:.2f}x")
+    return lines
+
+
+def format_report(report):
+    lines = []
+    for result in report['results']:
+        memory = (
+            f", peak RSS {result['peak_rss_mb']} MB, {result['conversion_rss_mb']} MB for the conversion"
+            if result['peak_rss_mb'] is not None else ''
+        )
+        lines.append(
+            f"{result['products']:>8} products → {result['rows']:>8} rows in {result['seconds']:.3f}s "
+            f"({result['rows_per_second']:,.0f} rows/s{memory})"
+        )
+        for step, seconds in result['steps'].items():
+            lines.append(f"{'':>12}{step}: {seconds:.4f}s")
+    return lines
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as fp:
+        json.dump(report, fp, indent=2)
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as fp:
+        return json.load(fp)
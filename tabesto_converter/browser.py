@@ -0,0 +1,126 @@
+"""Paged, filterable view over converted rows.
+
+:class:`ResultBrowser` indexes row positions by ``Producttype``, category
+and PLU prefix once, while the conversion runs. Filtering intersects those
+position lists (name search only looks at the candidates left) and a page
+only turns its own rows into dicts, so browsing a large menu never
+re-renders or re-scans the whole output.
+"""
+
+import threading
+from collections import OrderedDict
+
+from .plu import PLU_PREFIXES
+
+# Columns shown for each row, in display order
+BROWSER_COLUMNS = (
+    'PLU', 'Name', 'Producttype', 'Category', 'Price', 'Subproducts',
+    'Min', 'Max', 'isCombo', 'isUpsell', 'ProductTags', 'Imageurl',
+)
+PAGE_SIZE = 50
+
+# Filter results kept for reruns of the same query
+_MAX_QUERIES = 32
+
+
+def _add(index, key, position):
+    positions = index.get(key)
+    if positions is None:
+        index[key] = [position]
+    else:
+        positions.append(position)
+
+
+class ResultBrowser:
+    def __init__(self, rows):
+        self.rows = rows
+        self.by_type = {}
+        self.by_category = {}
+        self.by_prefix = {}
+        for position, row in enumerate(rows):
+            _add(self.by_type, row.Producttype, position)
+            _add(self.by_category, row.Category, position)
+            _add(self.by_prefix, PLU_PREFIXES.get(row.EntityType, ''), position)
+        self._names = None
+        self._sets = {}
+        self._queries = OrderedDict()
+        # Cached results are shared by every session looking at this conversion
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def count(self, producttype):
+        return len(self.by_type.get(producttype, ()))
+
+    def facets(self):
+        """Row counts per value of every filterable column."""
+        return {
+            'producttype': {key: len(positions) for key, positions in self.by_type.items()},
+            'category': {key: len(positions) for key, positions in self.by_category.items()},
+            'prefix': {key: len(positions) for key, positions in self.by_prefix.items()},
+        }
+
+    def _lowercase_names(self):
+        # Built on the first name search only
+        if self._names is None:
+            self._names = [str(row.Name).lower() for row in self.rows]
+        return self._names
+
+    def _position_set(self, facet, value):
+        key = (facet, value)
+        positions = self._sets.get(key)
+        if positions is None:
+            positions = self._sets[key] = set(getattr(self, facet).get(value, ()))
+        return positions
+
+    def query(self, producttype=None, category=None, prefix=None, name=None):
+        """Positions of the rows matching every given filter, in output order.
+
+        ``None`` means "don't filter"; ``name`` is a case-insensitive substring.
+        """
+        key = (producttype, category, prefix, (name or '').lower() or None)
+        with self._lock:
+            positions = self._queries.get(key)
+            if positions is not None:
+                self._queries.move_to_end(key)
+                return positions
+
+        selected = [
+            (facet, value)
+            for facet, value in (('by_type', producttype), ('by_category', category), ('by_prefix', prefix))
+            if value is not None
+        ]
+        if selected:
+            # Walk the shortest list, check membership in the others
+            selected.sort(key=lambda item: len(getattr(self, item[0]).get(item[1], ())))
+            facet, value = selected[0]
+            positions = getattr(self, facet).get(value, [])
+            if len(selected) > 1:
+                others = [self._position_set(*other) for other in selected[1:]]
+                positions = [position for position in positions if all(position in other for other in others)]
+        else:
+            positions = range(len(self.rows))
+
+        if key[3]:
+            names = self._lowercase_names()
+            positions = [position for position in positions if key[3] in names[position]]
+
+        with self._lock:
+            self._queries[key] = positions
+            if len(self._queries) > _MAX_QUERIES:
+                self._queries.popitem(last=False)
+        return positions
+
+    @staticmethod
+    def page_count(positions, page_size=PAGE_SIZE):
+        return max(1, -(-len(positions) // page_size))
+
+    def page(self, positions, page=1, page_size=PAGE_SIZE, columns=BROWSER_COLUMNS):
+        """Rows of 1-based ``page`` of ``positions`` as dicts of ``columns``."""
+        start = (page - 1) * page_size
+        rows = self.rows
+        return [
+            {column: getattr(rows[position], column) for column in columns}
+            for position in positions[start:start + page_size]
+        ]
@@ -0,0 +1,146 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+from .compression import open_input_bytes, zip_bytes
+from .engine import convert
+from .ingest import stream_exports
+from .writer import write_tsv
+
+# Rough memory taken by the rows kept for browsing, relative to their TSV
+BROWSER_SIZE_FACTOR = 4
+
+
+def content_key(product_bytes, image_bytes):
+    """Hash of the PRODUCT EXPORT and IMAGE EXPORT contents."""
+    digest = hashlib.sha256()
+    for data in (product_bytes, image_bytes):
+        # Length prefix so that moving bytes from one file to the other changes the key
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class CachedConversion:
+    """Everything the page needs to show a finished conversion."""
+
+    def __init__(self, tsv_bytes, stats, report=None, validation=None, browser=None):
+        self.tsv_bytes = tsv_bytes
+        self.stats = stats
+        self.report = report
+        self.validation = validation
+        self.browser = browser
+        self._zip_bytes = None
+
+    @property
+    def size(self):
+        # Counted so that kept rows and the zip push old entries out of the cache too
+        size = len(self.tsv_bytes) * (BROWSER_SIZE_FACTOR + 1 if self.browser is not None else 1)
+        return size + len(self._zip_bytes or b'')
+
+    def zip_bytes(self, member_name):
+        """The TSV as a zip archive, built on first use.
+
+        Use :meth:`ResultCache.zip_bytes` for cached entries, so the archive
+        counts towards the cache size.
+        """
+        if self._zip_bytes is None:
+            self._zip_bytes = zip_bytes(self.tsv_bytes, member_name)
+        return self._zip_bytes
+
+
+def run_conversion(product_bytes, image_bytes, progress=None):
+    # Only keep the fields the converter reads, the server is shared between sessions
+    # Compressed uploads are inflated while they are parsed
+    with open_input_bytes(product_bytes) as product_file, open_input_bytes(image_bytes) as image_file:
+        product_export_data, image_export_data = stream_exports(product_file, image_file)
+    # Built in-process: forking the threaded server risks deadlocks and the pool isn't faster
+    result = convert(product_export_data, image_export_data, progress=progress, validation='report', browse=True)
+
+    with result.report.stage('output') as timing:
+        tsv_buffer = io.BytesIO()
+        write_tsv(result.rows, tsv_buffer, languages=result.languages)
+        timing.rows = len(result.rows)
+    stats = {
+        'rows': len(result.rows),
+        'bundles': result.count('BUNDLE'),
+        'products': result.count('PRODUCT'),
+    }
+    return CachedConversion(tsv_buffer.getvalue(), stats, result.report.to_dict(),
+                            result.validation.to_dict(), result.browser)
+
+
+class ResultCache:
+    """Bounded LRU cache of conversions keyed by :func:`content_key`.
+
+    Entries are evicted least-recently-used first once either ``max_entries``
+    or ``max_bytes`` (total :attr:`CachedConversion.size`) is exceeded.
+    Safe to share between Streamlit sessions.
+    """
+
+    def __init__(self, max_entries=16, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _total_bytes(self):
+        # Summed every time: entries grow when their zip is built
+        return sum(entry.size for entry in self._entries.values())
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone is over max_bytes
+        total_bytes = self._total_bytes()
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            total_bytes -= evicted.size
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            self._evict()
+
+    def zip_bytes(self, entry, member_name):
+        """:meth:`CachedConversion.zip_bytes` of a cached ``entry``, evicting others if it no longer fits."""
+        data = entry.zip_bytes(member_name)
+        with self._lock:
+            self._evict()
+        return data
+
+    def get_or_convert(self, product_bytes, image_bytes, progress=None, key=None):
+        if key is None:
+            key = content_key(product_bytes, image_bytes)
+        entry = self.get(key)
+        if entry is None:
+            entry = run_conversion(product_bytes, image_bytes, progress=progress)
+            self.put(key, entry)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes(),
+            }
@@ -0,0 +1,99 @@
+"""Transparent gzip/zip handling for exports and templates.
+
+Inputs are recognised by their magic bytes rather than their name and are
+decompressed as they are read, so a compressed export is parsed without
+ever being inflated in full. Outputs are compressed as they are written.
+"""
+
+import gzip
+import io
+import zipfile
+from contextlib import contextmanager
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZIP_MAGIC = b'PK\x03\x04'
+
+# File names accepted for exports, compressed or not
+EXPORT_SUFFIXES = ('.json', '.json.gz', '.gz', '.zip')
+
+_COPY_CHUNK = 1024 * 1024
+
+
+def _zip_member(archive):
+    # A zipped export holds exactly one file (ignoring folders and macOS metadata)
+    names = [
+        info.filename for info in archive.infolist()
+        if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+    ]
+    if len(names) != 1:
+        raise ValueError(f'Expected exactly one file in the zip archive, found {len(names)}')
+    return names[0]
+
+
+def open_input(source):
+    """Open a path or binary file object for reading, decompressing gzip/zip on the fly.
+
+    File objects must be seekable and stay owned by the caller; paths are
+    opened (and closed with the returned file).
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        with open(source, 'rb') as fp:
+            magic = fp.read(4)
+        if magic.startswith(GZIP_MAGIC):
+            return gzip.open(source, 'rb')
+        if magic == ZIP_MAGIC:
+            with zipfile.ZipFile(source) as archive:
+                # The member keeps the archive's file open until it is closed itself
+                return archive.open(_zip_member(archive))
+        return open(source, 'rb')
+
+    position = source.tell()
+    magic = source.read(4)
+    source.seek(position)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=source, mode='rb')
+    if magic == ZIP_MAGIC:
+        archive = zipfile.ZipFile(source)
+        return archive.open(_zip_member(archive))
+    return source
+
+
+def open_input_bytes(data):
+    """:func:`open_input` for an upload held in memory."""
+    return open_input(io.BytesIO(data))
+
+
+@contextmanager
+def open_output(path, member_name):
+    """Binary file for ``path``, gzip- or zip-compressed when it ends in ``.gz``/``.zip``.
+
+    A zip archive gets a single file called ``member_name``.
+    """
+    if path.endswith('.gz'):
+        with gzip.open(path, 'wb') as fp:
+            yield fp
+    elif path.endswith('.zip'):
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(member_name, 'w', force_zip64=True) as fp:
+                yield fp
+    else:
+        with open(path, 'wb') as fp:
+            yield fp
+
+
+def zip_bytes(data, member_name):
+    """Zip archive holding ``data`` as ``member_name``, built chunk by chunk."""
+    buffer = io.BytesIO()
+    view = memoryview(data)
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(member_name, 'w', force_zip64=True) as fp:
+            for start in range(0, len(view), _COPY_CHUNK):
+                fp.write(view[start:start + _COPY_CHUNK])
+    return buffer.getvalue()
+
+
+def write_archive(members, archive_path):
+    """Write ``(archive name, file path)`` pairs into a zip file, streaming each file."""
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, path in members:
+            archive.write(path, name)
@@ -0,0 +1,143 @@
+"""Delta conversion between two versions of a site's menu export.
+
+Both versions go through the normal :func:`convert`; rows are then compared
+by PLU on their rendered TSV line, so any change of content or of resolved
+subproduct PLUs makes a row part of the delta.
+"""
+
+import io
+
+from .engine import convert, load_exports
+from .rows import compile_line_renderer, output_headers
+from .writer import write_tsv
+
+REMOVED_PLUS_FILE_NAME = 'REMOVED_PLUS.txt'
+
+
+class TemplateLayoutError(ValueError):
+    """A previous template whose columns differ from the current output."""
+
+
+class Delta:
+    """Rows to re-import plus the PLUs that disappeared since the previous version."""
+
+    def __init__(self, rows, added, changed, removed_plus, unchanged, languages):
+        self.rows = rows
+        self.added = added
+        self.changed = changed
+        self.removed_plus = removed_plus
+        self.unchanged = unchanged
+        self.languages = languages
+
+    def summary(self):
+        return {
+            'added': self.added,
+            'changed': self.changed,
+            'removed': len(self.removed_plus),
+            'unchanged': self.unchanged,
+        }
+
+
+def lines_by_plu(result):
+    """Rendered TSV line of every row of a conversion, keyed by PLU.
+
+    Rows sharing a PLU (duplicated ids in the export) are compared together.
+    """
+    render = compile_line_renderer(result.languages)
+    lines = {}
+    for row in result.rows:
+        lines[row.PLU] = lines.get(row.PLU, '') + render(row)
+    return lines
+
+
+def _tsv_records(text, tabs):
+    """Yield the records of a template, each made of exactly ``tabs`` tabs.
+
+    The writer doesn't escape line breaks, so a multi-line description spans
+    several physical lines; they are joined back until the record has all its
+    columns. The last column never holds free text, so a complete record
+    always ends at the first line break after its last tab.
+    """
+    record = ''
+    for line in text:
+        if not record and not line.strip():
+            # Blank line left by an editor
+            continue
+        record += line
+        found = record.count('\t')
+        if found < tabs:
+            continue
+        if found > tabs:
+            raise TemplateLayoutError(f'A row of the previous template has more than {tabs + 1} columns: {record!r}')
+        if not record.endswith('\n'):
+            record += '\n'
+        yield record
+        record = ''
+    if record:
+        raise TemplateLayoutError(f'The last row of the previous template has fewer than {tabs + 1} columns')
+
+
+def read_tsv_lines(tsv_file, languages):
+    """Read a previously generated template into ``{PLU: lines}``.
+
+    Raises :class:`TemplateLayoutError` when its header doesn't match the current output
+    columns: its lines can't be compared with the current rendering then,
+    and a delta would silently turn into a full template.
+    """
+    text = io.TextIOWrapper(tsv_file, encoding='utf-8-sig', newline='')
+    try:
+        header = text.readline()
+        headers = output_headers(languages)
+        if header != '\t'.join(headers) + '\n':
+            raise TemplateLayoutError(
+                "The previous template's columns don't match the current output "
+                "(was it generated with other --languages?); compare the exports instead"
+            )
+
+        plu_column = headers.index('PLU')
+        lines = {}
+        for line in _tsv_records(text, len(headers) - 1):
+            plu = line.split('\t', plu_column + 1)[plu_column]
+            lines[plu] = lines.get(plu, '') + line
+        return lines
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def compute_delta(previous_lines, current):
+    """Compare ``{PLU: lines}`` of the previous version with a current :class:`ConversionResult`."""
+    current_lines = lines_by_plu(current)
+    added = set()
+    changed = set()
+    for plu, lines in current_lines.items():
+        previous = previous_lines.get(plu)
+        if previous is None:
+            added.add(plu)
+        elif previous != lines:
+            changed.add(plu)
+
+    rows = [row for row in current.rows if row.PLU in added or row.PLU in changed]
+    removed_plus = [plu for plu in previous_lines if plu not in current_lines]
+    unchanged = len(current_lines) - len(added) - len(changed)
+    return Delta(rows, len(added), len(changed), removed_plus, unchanged, current.languages)
+
+
+def delta_from_exports(previous_product_file, previous_image_file, product_file, image_file, **convert_options):
+    """Delta between two PRODUCT/IMAGE export pairs."""
+    previous = convert(*load_exports(previous_product_file, previous_image_file), **convert_options)
+    current = convert(*load_exports(product_file, image_file), **convert_options)
+    return compute_delta(lines_by_plu(previous), current)
+
+
+def delta_from_tsv(previous_tsv_file, product_file, image_file, **convert_options):
+    """Delta between a previously generated template and a new export pair."""
+    current = convert(*load_exports(product_file, image_file), **convert_options)
+    return compute_delta(read_tsv_lines(previous_tsv_file, current.languages), current)
+
+
+def write_delta(delta, tsv_fp, removed_fp):
+    """Write the delta rows as a template and the removed PLUs one per line."""
+    preview = write_tsv(delta.rows, tsv_fp, languages=delta.languages)
+    removed_fp.write(''.join(f'{plu}\n' for plu in delta.removed_plus).encode('utf-8'))
+    return preview
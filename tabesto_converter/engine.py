@@ -0,0 +1,469 @@
+import copy
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from .browser import ResultBrowser
+from .instrumentation import ConversionReport
+from .languages import DEFAULT_LANGUAGE_CONFIG
+from .mapping import (
+    Allergens,
+    Constant,
+    EntitySpec,
+    ImageUrl,
+    MealBundles,
+    Miniature,
+    Price,
+    ReferenceIds,
+    RefText,
+    Texts,
+    Value,
+    compile_builder,
+)
+from .plu import BUNDLE, MEAL_DEAL, MODIFIER, MODIFIER_GROUP, PRODUCT, UPSELL_GROUP, PluResolver
+from .validation import VALIDATION_MODES, ValidationError, validate_rows
+
+IMAGE_URL_CLEANUP = re.compile(r'(upload/).*?(tabesto/)')
+
+
+def load_exports(product_file, image_file):
+    """Parse the PRODUCT EXPORT and IMAGE EXPORT files.
+
+    Returns ``(product_export_data, image_export_data)`` where the second item
+    is the list of pictures (empty when ``image_file`` is None).
+    """
+    product_export_data = json.load(product_file)
+    image_data = json.load(image_file) if image_file is not None else {}
+
+    # Handle both file formats: with or without 'data' wrapper
+    # If there's a 'data' key at top level, unwrap it
+    if 'data' in product_export_data and 'reference' not in product_export_data:
+        product_export_data = product_export_data['data']
+
+    if 'data' in image_data and 'pictures' not in image_data:
+        image_data = image_data['data']
+
+    return product_export_data, image_data.get('pictures', [])
+
+
+def _index_first(items):
+    # First item wins for duplicated ids, like the original linear scans did
+    index = {}
+    for item in items:
+        index.setdefault(item.get('id'), item)
+    return index
+
+
+def clean_image_urls(image_export_data):
+    """Map picture id → cleaned URL for a list of pictures."""
+    # Only the first picture with a non-empty URL is ever used for an id
+    image_urls_by_id = {}
+    for image in image_export_data:
+        image_id = image.get('id')
+        if image_id in image_urls_by_id:
+            continue
+        image_url = image.get('url', '')
+        if image_url:
+            image_urls_by_id[image_id] = IMAGE_URL_CLEANUP.sub(r'\1\2', image_url)
+    return image_urls_by_id
+
+
+class MenuIndex:
+    """Id-indexed view over a product export, built once per conversion.
+
+    ``image_urls`` is anything with a dict-like ``get`` mapping picture ids
+    to cleaned URLs (such as an :class:`~tabesto_converter.image_index.ImageIndex`);
+    when omitted it is built from ``image_export_data``.
+    """
+
+    def __init__(self, product_export_data, image_export_data, languages=DEFAULT_LANGUAGE_CONFIG, image_urls=None):
+        self.languages = languages
+        self.reference = product_export_data.get('reference', {})
+        self.products_by_id = _index_first(self.reference.get('product', []))
+        self.product_choices_by_id = _index_first(self.reference.get('product_choice', []))
+        self.image_urls_by_id = image_urls if image_urls is not None else clean_image_urls(image_export_data)
+        self.lookups = 0
+
+    def entities(self, name):
+        return self.reference.get(name, [])
+
+    def chunk(self, name, start, stop):
+        """View of this index where ``entities(name)`` is limited to ``[start:stop]``."""
+        view = copy.copy(self)
+        view.reference = dict(self.reference)
+        view.reference[name] = self.entities(name)[start:stop]
+        view.lookups = 0
+        return view
+
+    def product(self, product_id):
+        self.lookups += 1
+        return self.products_by_id.get(product_id)
+
+    def product_choice(self, choice_id):
+        self.lookups += 1
+        return self.product_choices_by_id.get(choice_id)
+
+    def image_url(self, image_ref_id):
+        if not image_ref_id:
+            return ''
+        self.lookups += 1
+        return self.image_urls_by_id.get(image_ref_id, '')
+
+
+class ConversionResult:
+    """Rows produced by a conversion, ready to be written out as TSV."""
+
+    def __init__(self, rows, resolver, languages=DEFAULT_LANGUAGE_CONFIG, report=None, validation=None,
+                 browser=None):
+        self.rows = rows
+        self.resolver = resolver
+        self.languages = languages
+        self.report = report
+        self.validation = validation
+        self.browser = browser
+
+    def count(self, producttype):
+        if self.browser is not None:
+            return self.browser.count(producttype)
+        return sum(1 for row in self.rows if row.Producttype == producttype)
+
+
+# STEP 1: CREATE BUNDLE GROUPS FOR MEAL DEALS
+# One bundle per meal step; ids are original ids, PLUs are assigned when rows are registered
+BUNDLE_SPEC = EntitySpec(BUNDLE, 'meal_sequence', each='items', fields=(
+    ('Name', Constant('Choose your option')),  # Per-language names stay blank for bundles
+    ('Multiple', Constant(1)),  # Always 1 for bundles
+    # Subproduct ids stay original ids until PLUs are resolved
+    ('SubproductIds', ReferenceIds('choices', ('product_suggestion', 'products'))),
+    ('Max', Constant(1)),
+    ('Min', Constant(1)),
+    ('Producttype', Constant('BUNDLE')),
+    ('isCombo', Constant('')),
+    ('Isinternal', Constant('')),  # Blank for bundles
+))
+
+
+def build_bundle_groups(index):
+    bundle_groups = _build_bundles(index)
+    bundles_by_meal = {}
+    for meal_sequence in index.entities('meal_sequence'):
+        meal_bundles = bundles_by_meal.setdefault(str(meal_sequence['id']), [])
+        meal_bundles.extend(f"{meal_sequence['id']}-{step_index}" for step_index in range(len(meal_sequence.get('items', []))))
+    return bundle_groups, bundles_by_meal
+
+
+# STEP 2: MEAL DEALS
+MEAL_DEAL_SPEC = EntitySpec(MEAL_DEAL, 'meal_sequence', refs=(('product_ref', 'product'),), fields=(
+    (('Name', 'Names'), Texts('name')),
+    ('ProductImageID', Miniature()),
+    ('Price', Price()),
+    ('SubproductIds', MealBundles()),
+    (('Description', 'Descriptions'), Texts('description', ref='product_ref')),
+    ('ProductTags', Allergens(ref='product_ref')),
+    ('Producttype', Constant('PRODUCT')),
+    ('isCombo', Constant('TRUE')),
+    ('Isinternal', Constant('TRUE')),  # Set to TRUE when isCombo is TRUE
+    ('Imageurl', ImageUrl()),
+))
+
+
+# STEP 3: PRODUCTS
+PRODUCT_SPEC = EntitySpec(PRODUCT, 'product', fields=(
+    (('Name', 'Names'), Texts('name')),
+    ('ProductImageID', Miniature()),
+    ('Price', Price()),
+    ('SubproductIds', ReferenceIds('options')),
+    (('Description', 'Descriptions'), Texts('description')),
+    ('Max', Value(('modifier_groups', 'quantity_info', 'quantity', 'max_permitted'))),
+    ('Min', Value(('modifier_groups', 'quantity_info', 'quantity', 'min_permitted'))),
+    ('ProductTags', Allergens()),
+    ('Producttype', Constant('PRODUCT')),
+    ('isCombo', Constant('FALSE')),
+    ('Isinternal', Constant('FALSE')),  # FALSE for regular products
+    ('Imageurl', ImageUrl()),
+))
+
+
+# STEP 4: MODIFIER
+MODIFIER_SPEC = EntitySpec(MODIFIER, 'product_option_choice', refs=(('choice_ref', 'product_choice'),), fields=(
+    (('Name', 'Names'), Texts('name')),
+    ('Price', Price(missing=0)),  # Always set to 0 if no price for MODIFIER
+    ('ProductTags', Allergens(ref='choice_ref')),
+    ('Producttype', Constant('MODIFIER')),
+    ('isCombo', Constant('FALSE')),
+    ('Isinternal', Constant('')),  # Blank for modifiers
+))
+
+
+# STEP 5: MODIFIER GROUP
+MODIFIER_GROUP_SPEC = EntitySpec(MODIFIER_GROUP, 'product_option', refs=(('product_ref', 'product'),), fields=(
+    (('Name', 'Names'), Texts('name')),
+    # A product with the same id names the group in the default language
+    ('Name', RefText('product_ref', 'name')),
+    ('SubproductIds', ReferenceIds('choices')),
+    ('Max', Value('max_allowed')),
+    ('Min', Value('min_required')),
+    ('Producttype', Constant('MODIFIER_GROUP')),
+    ('isUpsell', Constant('FALSE')),
+    ('isCombo', Constant('')),
+    ('Isinternal', Constant('')),  # Blank for modifier groups
+))
+
+
+# STEP 6: UPSELL GROUP
+UPSELL_GROUP_SPEC = EntitySpec(UPSELL_GROUP, 'product_suggestion', where=('type', 'ADDITIONAL'), fields=(
+    (('Name', 'Names'), Texts('name')),
+    ('SubproductIds', ReferenceIds('products')),
+    ('Max', Constant(99)),
+    ('Min', Constant(0)),
+    ('Producttype', Constant('MODIFIER_GROUP')),
+    ('isUpsell', Constant('TRUE')),
+    ('isCombo', Constant('')),
+    ('Isinternal', Constant('')),  # Blank for upsell groups
+))
+
+# Compiled once at import; each is a plain loop over its reference array
+_build_bundles = compile_builder(BUNDLE_SPEC)
+build_meal_deals = compile_builder(MEAL_DEAL_SPEC)
+build_products = compile_builder(PRODUCT_SPEC)
+build_modifiers = compile_builder(MODIFIER_SPEC)
+build_modifier_groups = compile_builder(MODIFIER_GROUP_SPEC)
+build_upsell_groups = compile_builder(UPSELL_GROUP_SPEC)
+
+
+# STEP 7: CATEGORY POPULATION
+# How to pick a category for a product listed in several categories:
+# - first   → the first category in export order that lists it
+# - all     → every category that lists it, comma separated, in export order
+# - primary → the category where it is listed highest (earliest position)
+CATEGORY_POLICIES = ('first', 'all', 'primary')
+
+
+def build_category_index(index, policy='first'):
+    """Map product id → category name in a single pass over ``reference.category``."""
+    if policy not in CATEGORY_POLICIES:
+        raise ValueError(f"Unknown category policy {policy!r}, expected one of {', '.join(CATEGORY_POLICIES)}")
+
+    found = {}
+    for category in index.entities('category'):
+        category_name = index.languages.text(category.get('name'))
+        product_ids = [str(p.get('reference_id', '')) for p in category.get('products', []) if p.get('reference_id')]
+        for position, product_id in enumerate(product_ids):
+            if policy == 'first':
+                found.setdefault(product_id, category_name)
+            elif policy == 'all':
+                # dict keys keep the export order and drop repeated names
+                found.setdefault(product_id, {})[category_name] = None
+            elif product_id not in found or position < found[product_id][0]:
+                found[product_id] = (position, category_name)
+
+    if policy == 'all':
+        return {product_id: ','.join(names) for product_id, names in found.items()}
+    if policy == 'primary':
+        return {product_id: name for product_id, (_, name) in found.items()}
+    return found
+
+
+def apply_categories(index, output_data, policy='first'):
+    category_by_product = build_category_index(index, policy)
+    for row in output_data:
+        if row.Producttype == 'PRODUCT' and row.SourceID:
+            index.lookups += 1
+            row.Category = category_by_product.get(row.SourceID, '')
+
+
+# STEP 8: RESOLVE SUBPRODUCT REFERENCES TO PLUS
+def resolve_subproducts(output_data, resolver):
+    for row in output_data:
+        subproduct_ids = row.SubproductIds
+        if subproduct_ids:
+            row.Subproducts = ','.join(resolver.resolve_all(row.EntityType, subproduct_ids))
+
+
+# PARALLEL STEPS 2-6
+# Each of these steps only reads the index and builds its own rows, so they
+# can be built in worker processes. Inputs are cut into chunks of
+# PARALLEL_CHUNK_SIZE entities and the chunks are put back in input order,
+# which keeps the rows (and the TSV) identical to the sequential path.
+# Opt-in only: the parent has to unpickle every row, which measured about as
+# long as building them in-process (40k products: 2.0s sequential, 5.6s with
+# 2 workers on one core), so more cores alone can't make it faster.
+PARALLEL_STEPS = (
+    ('meal_deals', 'meal_sequence'),
+    ('products', 'product'),
+    ('modifiers', 'product_option_choice'),
+    ('modifier_groups', 'product_option'),
+    ('upsell_groups', 'product_suggestion'),
+)
+PARALLEL_CHUNK_SIZE = 5000
+
+# Steps other than meal deals only need the index
+STEP_BUILDERS = {
+    'products': build_products,
+    'modifiers': build_modifiers,
+    'modifier_groups': build_modifier_groups,
+    'upsell_groups': build_upsell_groups,
+}
+
+_worker_state = {}
+
+
+def _init_worker(index, bundles_by_meal):
+    # Forked workers inherit these without copying; other start methods unpickle them once
+    _worker_state['index'] = index
+    _worker_state['bundles_by_meal'] = bundles_by_meal
+
+
+def _build_chunk(step, entity_name, start, stop):
+    index = _worker_state['index'].chunk(entity_name, start, stop)
+    if step == 'meal_deals':
+        rows = build_meal_deals(index, _worker_state['bundles_by_meal'])
+    else:
+        rows = STEP_BUILDERS[step](index)
+    return rows, index.lookups
+
+
+def build_steps_parallel(index, bundles_by_meal, workers):
+    """Yield ``(step, rows, lookups)`` for steps 2-6, in step order.
+
+    All chunks are submitted up front, so later steps are built while the
+    caller handles the rows of earlier ones.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(index, bundles_by_meal)) as pool:
+        futures = []
+        for step, entity_name in PARALLEL_STEPS:
+            count = len(index.entities(entity_name))
+            futures.append((step, [
+                pool.submit(_build_chunk, step, entity_name, start, start + PARALLEL_CHUNK_SIZE)
+                for start in range(0, count, PARALLEL_CHUNK_SIZE)
+            ]))
+        for step, chunk_futures in futures:
+            rows = []
+            lookups = 0
+            for future in chunk_futures:
+                chunk_rows, chunk_lookups = future.result()
+                rows.extend(chunk_rows)
+                lookups += chunk_lookups
+            yield step, rows, lookups
+
+
+def plan_stages(product_export_data, image_export_data):
+    """Input items each stage will go through, used to weigh progress."""
+    reference = product_export_data.get('reference', {})
+    counts = {name: len(reference.get(name, [])) for name in (
+        'meal_sequence', 'product', 'product_choice', 'product_option_choice',
+        'product_option', 'product_suggestion', 'category',
+    )}
+    expected_rows = (2 * counts['meal_sequence'] + counts['product'] + counts['product_option_choice']
+                     + counts['product_option'] + counts['product_suggestion'])
+    return {
+        'index': counts['product'] + counts['product_choice'] + len(image_export_data or ()),
+        'bundle_groups': counts['meal_sequence'],
+        'meal_deals': counts['meal_sequence'],
+        'products': counts['product'],
+        'modifiers': counts['product_option_choice'],
+        'modifier_groups': counts['product_option'],
+        'upsell_groups': counts['product_suggestion'],
+        'categories': counts['category'] + counts['product'] + counts['meal_sequence'],
+        'plu': expected_rows,
+        'browser': expected_rows,
+        'validation': expected_rows,
+        'output': expected_rows,
+    }
+
+
+def convert(product_export_data, image_export_data, progress=None, category_policy='first', languages=None,
+            report=None, image_urls=None, workers=None, validation='off', browse=False):
+    """Convert a parsed product export into Deliverect import rows.
+
+    ``progress`` is an optional ``callback(message, percent)`` used by the
+    Streamlit page to drive its progress bar. ``category_policy`` is one of
+    :data:`CATEGORY_POLICIES` and ``languages`` a :class:`LanguageConfig`
+    (French default with en/es/fr columns when omitted). Stage timings are
+    recorded in ``report`` (a new :class:`ConversionReport` by default),
+    available as ``result.report``. ``image_urls`` replaces the picture
+    lookup built from ``image_export_data``, see :class:`MenuIndex`.
+    With ``workers`` > 1, steps 2-6 are built in that many processes; the
+    rows are the same, but see the note on :data:`PARALLEL_STEPS` before
+    using it.
+    ``validation`` is one of :data:`VALIDATION_MODES`; the
+    :class:`ValidationReport` is available as ``result.validation`` and in
+    ``strict`` mode any issue raises :class:`ValidationError`. With
+    ``browse``, a :class:`ResultBrowser` over the rows is available as
+    ``result.browser``.
+    """
+    if validation not in VALIDATION_MODES:
+        raise ValueError(f"Unknown validation mode {validation!r}, expected one of {', '.join(VALIDATION_MODES)}")
+    languages = languages or DEFAULT_LANGUAGE_CONFIG
+    report = report or ConversionReport(progress)
+    planned = plan_stages(product_export_data, image_export_data)
+    if validation == 'off':
+        del planned['validation']
+    if not browse:
+        del planned['browser']
+    report.plan(planned)
+
+    with report.stage('index'):
+        index = MenuIndex(product_export_data, image_export_data, languages, image_urls)
+    resolver = PluResolver()
+    report.watch(index)
+    report.watch(resolver)
+    output_data = []
+
+    def add_rows(rows, timing):
+        # Give every row its prefixed PLU and record it for subproduct resolution
+        for row in rows:
+            row.PLU = resolver.register(row.EntityType, row.SourceID)
+        output_data.extend(rows)
+        timing.rows = len(rows)
+
+    with report.stage('bundle_groups') as timing:
+        bundle_groups, bundles_by_meal = build_bundle_groups(index)
+        add_rows(bundle_groups, timing)
+
+    if workers and workers > 1:
+        steps = build_steps_parallel(index, bundles_by_meal, workers)
+        for step, _ in PARALLEL_STEPS:
+            # A stage's time is how long its rows were waited for
+            with report.stage(step) as timing:
+                _, rows, lookups = next(steps)
+                index.lookups += lookups
+                add_rows(rows, timing)
+        steps.close()
+    else:
+        with report.stage('meal_deals') as timing:
+            add_rows(build_meal_deals(index, bundles_by_meal), timing)
+
+        with report.stage('products') as timing:
+            add_rows(build_products(index), timing)
+
+        with report.stage('modifiers') as timing:
+            add_rows(build_modifiers(index), timing)
+
+        with report.stage('modifier_groups') as timing:
+            add_rows(build_modifier_groups(index), timing)
+
+        with report.stage('upsell_groups') as timing:
+            add_rows(build_upsell_groups(index), timing)
+
+    with report.stage('categories'):
+        apply_categories(index, output_data, category_policy)
+
+    with report.stage('plu'):
+        resolve_subproducts(output_data, resolver)
+
+    browser = None
+    if browse:
+        with report.stage('browser'):
+            browser = ResultBrowser(output_data)
+
+    validation_report = None
+    if validation != 'off':
+        with report.stage('validation') as timing:
+            validation_report = validate_rows(output_data)
+            timing.rows = len(validation_report.issues)
+        if validation == 'strict' and not validation_report.ok:
+            raise ValidationError(validation_report)
+
+    return ConversionResult(output_data, resolver, languages, report, validation_report, browser)
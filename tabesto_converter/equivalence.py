@@ -0,0 +1,237 @@
+"""Differential check of the engine against the original conversion.
+
+Runs :func:`~tabesto_converter.legacy.legacy_convert` once and the engine
+once per entry of :data:`ENGINE_RUNS` on the same exports, and compares
+the downloaded bytes. Those entries are the ways the CLI, batch and the
+page actually run the engine: json or streaming ingestion, the image
+index, the process pool, validation and browsing, and the page's own
+cached conversion. When a run differs, the report pins down the first
+rows and columns that differ instead of dumping both files. Each
+comparison also records the run times, so the speedup per input size is
+tracked with the same run.
+
+Known, intended differences from the original:
+
+- a product listed by two categories with identical product lists gets
+  the first category (the original kept the last);
+- subproduct ids are resolved per entity type, so an id that happens to
+  start with ``M``/``P``/``MD``... is no longer mistaken for a prefixed PLU;
+- a meal whose id contains ``-`` no longer picks up another meal's bundles.
+"""
+
+import io
+import json
+import platform
+import tempfile
+import time
+import traceback
+
+from .cache import run_conversion
+from .compression import open_input
+from .engine import convert
+from .image_index import read_exports
+from .legacy import legacy_convert
+from .synthetic import generate_menu_bytes
+from .writer import write_tsv
+
+# The original conversion is quadratic; larger sizes take minutes
+DEFAULT_SIZES = (100, 1000, 3000)
+MAX_DIFFERENCES = 20
+
+
+def run_legacy(product_bytes, image_bytes):
+    """TSV bytes of the original conversion, as the page offered them (UTF-8 with BOM)."""
+    return legacy_convert(io.BytesIO(product_bytes), io.BytesIO(image_bytes)).encode('utf-8-sig')
+
+
+def run_engine(product_bytes, image_bytes, streaming=False, image_cache=None, **convert_options):
+    """TSV bytes of the engine, reading the exports like the CLI and batch do.
+
+    With ``image_cache`` the pictures come from an image index compiled in
+    that directory.
+    """
+    product_export_data, image_export_data, image_urls = read_exports(
+        product_bytes, image_bytes, streaming, image_cache,
+    )
+    try:
+        result = convert(product_export_data, image_export_data, image_urls=image_urls, **convert_options)
+    finally:
+        if image_urls is not None:
+            image_urls.close()
+    tsv_buffer = io.BytesIO()
+    write_tsv(result.rows, tsv_buffer, languages=result.languages)
+    return tsv_buffer.getvalue()
+
+
+def run_page(product_bytes, image_bytes):
+    """TSV bytes the Streamlit page offers for download."""
+    return run_conversion(product_bytes, image_bytes).tsv_bytes
+
+
+# (name, function, options) of every way the engine is run; the first one gives the speedup.
+# An ``image_cache`` option of True stands for a temporary directory.
+ENGINE_RUNS = (
+    ('load', run_engine, {}),
+    ('streaming', run_engine, {'streaming': True}),
+    ('image index', run_engine, {'image_cache': True}),
+    ('workers', run_engine, {'workers': 2}),
+    ('validation', run_engine, {'validation': 'report', 'browse': True}),
+    ('page', run_page, {}),
+)
+
+
+def _timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    value = function(*args, **kwargs)
+    return value, time.perf_counter() - started
+
+
+def _tsv_lines(data):
+    # Every line ends with '\n', which is not an extra empty row
+    lines = data.decode('utf-8-sig').split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+def diff_tsv(expected, actual, max_differences=MAX_DIFFERENCES):
+    """Cell-level differences between two TSV byte strings, row by row.
+
+    Returns at most ``max_differences`` dicts with the line number, the PLU
+    of the expected row, the column and both values; missing or extra rows
+    are reported with ``column`` None.
+    """
+    expected_lines = _tsv_lines(expected)
+    actual_lines = _tsv_lines(actual)
+    headers = expected_lines[0].split('\t')
+    plu_column = headers.index('PLU') if 'PLU' in headers else None
+
+    differences = []
+    for line_number in range(max(len(expected_lines), len(actual_lines))):
+        if len(differences) >= max_differences:
+            break
+        expected_line = expected_lines[line_number] if line_number < len(expected_lines) else None
+        actual_line = actual_lines[line_number] if line_number < len(actual_lines) else None
+        if expected_line == actual_line:
+            continue
+
+        expected_cells = expected_line.split('\t') if expected_line is not None else []
+        actual_cells = actual_line.split('\t') if actual_line is not None else []
+        reference_cells = expected_cells or actual_cells
+        plu = reference_cells[plu_column] if plu_column is not None and plu_column < len(reference_cells) else None
+        if expected_line is None or actual_line is None:
+            differences.append({
+                'line': line_number + 1, 'plu': plu, 'column': None,
+                'expected': expected_line, 'actual': actual_line,
+            })
+            continue
+        for position in range(max(len(expected_cells), len(actual_cells))):
+            expected_cell = expected_cells[position] if position < len(expected_cells) else None
+            actual_cell = actual_cells[position] if position < len(actual_cells) else None
+            if expected_cell != actual_cell:
+                differences.append({
+                    'line': line_number + 1, 'plu': plu,
+                    'column': headers[position] if position < len(headers) else position,
+                    'expected': expected_cell, 'actual': actual_cell,
+                })
+                if len(differences) >= max_differences:
+                    break
+    return differences
+
+
+def compare_exports(product_bytes, image_bytes, label, max_differences=MAX_DIFFERENCES, engine_runs=ENGINE_RUNS):
+    """Run the original conversion and every engine run on one export pair and compare their output."""
+    legacy_bytes, legacy_seconds = _timed(run_legacy, product_bytes, image_bytes)
+    runs = []
+    with tempfile.TemporaryDirectory() as image_cache:
+        for name, function, options in engine_runs:
+            if options.get('image_cache') is True:
+                options = dict(options, image_cache=image_cache)
+            engine_bytes, engine_seconds = _timed(function, product_bytes, image_bytes, **options)
+            identical = legacy_bytes == engine_bytes
+            runs.append({
+                'name': name,
+                'identical': identical,
+                'seconds': round(engine_seconds, 6),
+                'differences': [] if identical else diff_tsv(legacy_bytes, engine_bytes, max_differences),
+            })
+    engine_seconds = runs[0]['seconds']
+    return {
+        'label': label,
+        'input_bytes': len(product_bytes) + len(image_bytes),
+        'rows': legacy_bytes.count(b'\n') - 1,
+        'identical': all(run['identical'] for run in runs),
+        'legacy_seconds': round(legacy_seconds, 6),
+        'engine_seconds': engine_seconds,
+        'speedup': round(legacy_seconds / engine_seconds, 2) if engine_seconds else None,
+        'runs': runs,
+    }
+
+
+def compare_site(site):
+    """:func:`compare_exports` on a recorded site. Never raises; failures are reported."""
+    try:
+        if not site.product_path or not site.image_path:
+            raise FileNotFoundError('PRODUCT EXPORT or IMAGE EXPORT json not found')
+        with open_input(site.product_path) as product_file, open_input(site.image_path) as image_file:
+            product_bytes, image_bytes = product_file.read(), image_file.read()
+        return compare_exports(product_bytes, image_bytes, site.name)
+    except Exception as e:
+        return {
+            'label': site.name,
+            'identical': False,
+            'error': f"{type(e).__name__}: {e}",
+            'traceback': traceback.format_exc(),
+        }
+
+
+def run_equivalence(sizes=DEFAULT_SIZES, seed=0, sites=()):
+    """Compare both conversions on synthetic menus of ``sizes`` products and on recorded ``sites``.
+
+    ``sites`` are :class:`~tabesto_converter.batch.Site` objects; their
+    exports may be compressed. Like in a batch, a site that can't be read or
+    converted is reported with its error (and makes the report not
+    identical) without stopping the other sites.
+    """
+    results = []
+    for products in sizes:
+        product_bytes, image_bytes = generate_menu_bytes(products, seed)
+        result = compare_exports(product_bytes, image_bytes, f'synthetic-{products}')
+        result['products'] = products
+        results.append(result)
+    for site in sites:
+        results.append(compare_site(site))
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'identical': all(result['identical'] for result in results),
+        'results': results,
+    }
+
+
+def format_equivalence(report):
+    lines = []
+    for result in report['results']:
+        if 'error' in result:
+            lines.append(f"{result['label']:>20}: ❌ {result['error']}")
+            continue
+        status = '✅ identical' if result['identical'] else '❌ differs'
+        lines.append(
+            f"{result['label']:>20}: {status}, {result['rows']} rows, "
+            f"legacy {result['legacy_seconds']:.3f}s vs engine {result['engine_seconds']:.3f}s "
+            f"({result['speedup']}x)"
+        )
+        for run in result['runs']:
+            status = '✅' if run['identical'] else f"❌ first {len(run['differences'])} differences:"
+            lines.append(f"{'':>22}{run['name']:<12} {run['seconds']:.3f}s {status}")
+            for difference in run['differences']:
+                lines.append(
+                    f"{'':>24}line {difference['line']} PLU {difference['plu']} {difference['column']}: "
+                    f"{difference['expected']!r} → {difference['actual']!r}"
+                )
+    return lines
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as fp:
+        json.dump(report, fp, indent=2, ensure_ascii=False)
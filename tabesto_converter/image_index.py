@@ -0,0 +1,173 @@
+"""Persistent picture id → cleaned URL index.
+
+The same brand image library is shared by many sites, so re-parsing the
+IMAGE EXPORT and re-running the URL cleanup for every conversion is wasted
+work. :func:`open_image_index` compiles an export once into a small SQLite
+file named after the export's content hash and opens it read-only
+(memory-mapped) on later runs. A changed export has a different hash and
+therefore gets a fresh index; old index files are pruned.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import tempfile
+
+from .compression import open_input, open_input_bytes
+from .engine import clean_image_urls, load_exports
+from .ingest import stream_exports, stream_pictures
+
+# Bump when the stored format or the URL cleanup changes
+IMAGE_INDEX_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'tabesto_converter', 'images')
+MAX_INDEX_FILES = 64
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def _picture_key(picture_id):
+    # Keep the JSON type: picture 12 and picture "12" are different ids
+    return json.dumps(picture_id)
+
+
+def hash_image_export(source):
+    """SHA-256 of an IMAGE EXPORT given as bytes or as a path."""
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    else:
+        with open(source, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(_HASH_CHUNK), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def index_path(cache_dir, content_hash):
+    return os.path.join(cache_dir, f'images-v{IMAGE_INDEX_VERSION}-{content_hash}.sqlite')
+
+
+class ImageIndex:
+    """Read-only, lazily queried picture index with a dict-like ``get``."""
+
+    def __init__(self, path):
+        self.path = path
+        self._seen = {}
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+        # Worker processes open their own connection
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def _query(self, sql, parameters=()):
+        # SQLite connections must not be shared with forked children
+        if self._pid != os.getpid():
+            # as_uri() percent-encodes '#', '?' and '%' and handles Windows drive letters
+            uri = pathlib.Path(self.path).absolute().as_uri() + '?mode=ro'
+            self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._connection.execute('PRAGMA mmap_size = 268435456')
+            self._pid = os.getpid()
+        return self._connection.execute(sql, parameters).fetchone()
+
+    def __len__(self):
+        return self._query('SELECT COUNT(*) FROM images')[0]
+
+    def get(self, picture_id, default=''):
+        key = _picture_key(picture_id)
+        url = self._seen.get(key)
+        if url is None:
+            found = self._query('SELECT url FROM images WHERE key = ?', (key,))
+            url = self._seen[key] = found[0] if found else ''
+        return url or default
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+        self._pid = None
+
+
+def build_image_index(image_export_data, path):
+    """Write the cleaned URL of every picture to a new index file at ``path``."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Build next to the final file and rename, so concurrent readers never see half an index
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(temp_path)
+        with connection:
+            connection.execute('CREATE TABLE images (key TEXT PRIMARY KEY, url TEXT NOT NULL) WITHOUT ROWID')
+            connection.executemany(
+                'INSERT INTO images VALUES (?, ?)',
+                ((_picture_key(picture_id), url) for picture_id, url in clean_image_urls(image_export_data).items()),
+            )
+        connection.close()
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def prune_image_indexes(cache_dir, keep=MAX_INDEX_FILES):
+    """Delete the least recently used index files beyond ``keep``."""
+    try:
+        names = [name for name in os.listdir(cache_dir) if name.startswith('images-') and name.endswith('.sqlite')]
+    except FileNotFoundError:
+        return
+    paths = sorted((os.path.join(cache_dir, name) for name in names), key=os.path.getmtime, reverse=True)
+    for path in paths[keep:]:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def open_image_index(image_source, cache_dir=DEFAULT_CACHE_DIR):
+    """Open the index for an IMAGE EXPORT (bytes or path, possibly compressed), compiling it if needed."""
+    content_hash = hash_image_export(image_source)
+    path = index_path(cache_dir, content_hash)
+    if os.path.exists(path):
+        # Mark as recently used for pruning
+        os.utime(path)
+    else:
+        with _open_export(image_source) as image_file:
+            build_image_index(stream_pictures(image_file), path)
+        prune_image_indexes(cache_dir)
+    return ImageIndex(path)
+
+
+def _open_export(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return open_input_bytes(source)
+    return open_input(source)
+
+
+def read_exports(product_source, image_source, streaming=False, image_cache=None):
+    """Read an export pair given as paths or bytes, possibly compressed.
+
+    Returns ``(product_export_data, image_export_data, image_urls)``, ready
+    for :func:`~tabesto_converter.engine.convert`. With ``streaming`` the
+    exports are read with :func:`stream_exports`. With an ``image_cache``
+    directory the IMAGE EXPORT is looked up in an index compiled there:
+    ``image_export_data`` is then empty and ``image_urls`` is the open
+    :class:`ImageIndex`, which the caller closes after converting.
+    Otherwise ``image_urls`` is None.
+    """
+    read = stream_exports if streaming else load_exports
+    image_urls = open_image_index(image_source, image_cache) if image_cache else None
+    try:
+        with _open_export(product_source) as product_file:
+            if image_urls is not None:
+                return (*read(product_file, None), image_urls)
+            with _open_export(image_source) as image_file:
+                return (*read(product_file, image_file), None)
+    except BaseException:
+        if image_urls is not None:
+            image_urls.close()
+        raise
@@ -0,0 +1,144 @@
+"""Streaming ingestion of PRODUCT/IMAGE exports.
+
+``json.load`` builds the whole export as Python objects before the
+conversion starts, and most of that tree (audit fields, other picture
+formats, translations metadata, ...) is never read. :func:`stream_exports`
+walks the JSON events with ``ijson`` instead and only materializes the
+fields listed in :data:`REFERENCE_FIELDS`, so the raw tree never exists.
+
+Without ``ijson`` installed it falls back to ``json.load`` and compacts the
+result with the same field lists, which still frees the raw tree before
+the conversion starts.
+"""
+
+import json
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None
+
+# Marker for "keep this value as it is"
+KEEP = None
+
+_TEXT = {'data': {'lang': KEEP, 'text': KEEP}}
+_PICTURES = {'type': KEEP, 'reference_id': KEEP}
+_REFERENCES = {'reference_id': KEEP}
+
+# Fields the converter reads, per reference array
+REFERENCE_FIELDS = {
+    'meal_sequence': {
+        'id': KEEP, 'name': _TEXT, 'price': KEEP, 'pictures': _PICTURES,
+        'items': {'choices': _REFERENCES, 'product_suggestion': {'products': _REFERENCES}},
+    },
+    'product': {
+        'id': KEEP, 'name': _TEXT, 'description': _TEXT, 'price': KEEP, 'allergens': KEEP,
+        'pictures': _PICTURES, 'options': _REFERENCES,
+        'modifier_groups': {'quantity_info': {'quantity': {'max_permitted': KEEP, 'min_permitted': KEEP}}},
+    },
+    'product_option_choice': {'id': KEEP, 'name': _TEXT, 'price': KEEP},
+    'product_choice': {'id': KEEP, 'allergens': KEEP},
+    'product_option': {
+        'id': KEEP, 'name': _TEXT, 'choices': _REFERENCES, 'max_allowed': KEEP, 'min_required': KEEP,
+    },
+    'product_suggestion': {'id': KEEP, 'type': KEEP, 'name': _TEXT, 'products': _REFERENCES},
+    'category': {'name': _TEXT, 'products': _REFERENCES},
+}
+PICTURE_FIELDS = {'id': KEEP, 'url': KEEP}
+
+PRODUCT_EXPORT_FIELDS = {'reference': REFERENCE_FIELDS, 'data': {'reference': REFERENCE_FIELDS}}
+IMAGE_EXPORT_FIELDS = {'pictures': PICTURE_FIELDS, 'data': {'pictures': PICTURE_FIELDS}}
+
+
+def compact(value, fields):
+    """Drop everything from ``value`` that isn't listed in ``fields``.
+
+    ``fields`` maps keys to the fields to keep below them (or :data:`KEEP`);
+    it applies to every element of a list. Keys that are missing stay
+    missing, so ``.get()`` defaults behave exactly as on the raw export.
+    """
+    if fields is KEEP:
+        return value
+    if isinstance(value, dict):
+        return {key: compact(item, fields[key]) for key, item in value.items() if key in fields}
+    if isinstance(value, list):
+        return [compact(item, fields) for item in value]
+    return value
+
+
+def _skip(events, event):
+    # Consume the rest of a container we don't need
+    if event not in ('start_map', 'start_array'):
+        return
+    depth = 1
+    for event, _ in events:
+        if event in ('start_map', 'start_array'):
+            depth += 1
+        elif event in ('end_map', 'end_array'):
+            depth -= 1
+            if not depth:
+                return
+
+
+# Short strings (keys, language codes, picture types, allergens) repeat
+# thousands of times; like json.load does for keys, share one copy of each.
+_SHARED_MAX_LENGTH = 16
+
+
+def _read(events, event, value, fields, shared):
+    # Build one JSON value from the event stream, keeping only ``fields``
+    if event == 'start_map':
+        result = {}
+        for event, key in events:
+            if event == 'end_map':
+                return result
+            event, value = next(events)
+            if fields is KEEP:
+                result[shared.setdefault(key, key)] = _read(events, event, value, KEEP, shared)
+            elif isinstance(fields, dict) and key in fields:
+                result[shared.setdefault(key, key)] = _read(events, event, value, fields[key], shared)
+            else:
+                _skip(events, event)
+    elif event == 'start_array':
+        result = []
+        for event, value in events:
+            if event == 'end_array':
+                return result
+            result.append(_read(events, event, value, fields, shared))
+    elif event == 'string' and len(value) <= _SHARED_MAX_LENGTH:
+        return shared.setdefault(value, value)
+    return value
+
+
+def _read_document(fp, fields):
+    events = ijson.basic_parse(fp, use_float=True)
+    event, value = next(events)
+    return _read(events, event, value, fields, {})
+
+
+def _unwrap(document, key):
+    # Handle both file formats: with or without 'data' wrapper
+    if isinstance(document, dict) and 'data' in document and key not in document:
+        return document['data']
+    return document
+
+
+def _read_compact(fp, fields):
+    if ijson is not None:
+        return _read_document(fp, fields)
+    return compact(json.load(fp), fields)
+
+
+def stream_pictures(image_file):
+    """Pictures of an IMAGE EXPORT, with only their id and url."""
+    return _unwrap(_read_compact(image_file, IMAGE_EXPORT_FIELDS), 'pictures').get('pictures', [])
+
+
+def stream_exports(product_file, image_file):
+    """Drop-in replacement for :func:`load_exports` keeping only used fields.
+
+    ``product_file`` and ``image_file`` are binary file objects; without
+    ``image_file`` the pictures list is empty.
+    """
+    product_export_data = _unwrap(_read_compact(product_file, PRODUCT_EXPORT_FIELDS), 'reference')
+    return product_export_data, stream_pictures(image_file) if image_file is not None else []
@@ -0,0 +1,120 @@
+"""Per-stage timing of a conversion.
+
+:class:`ConversionReport` records wall time, rows produced and index
+lookups for every stage, and turns the amount of input each stage has
+processed into progress for the Streamlit progress bar.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+# (name, label) in execution order
+STAGES = (
+    ('index', 'Indexing exports'),
+    ('bundle_groups', 'Creating bundle groups'),
+    ('meal_deals', 'Processing meal deals'),
+    ('products', 'Processing products'),
+    ('modifiers', 'Processing modifiers'),
+    ('modifier_groups', 'Processing modifier groups'),
+    ('upsell_groups', 'Processing upsell groups'),
+    ('categories', 'Adding categories'),
+    ('plu', 'Resolving PLU references'),
+    ('browser', 'Indexing rows for browsing'),
+    ('validation', 'Validating references'),
+    ('output', 'Writing output'),
+)
+STAGE_LABELS = dict(STAGES)
+STAGE_NUMBERS = {name: number for number, (name, _) in enumerate(STAGES, 1)}
+
+
+class StageTiming:
+    def __init__(self, name, units=0):
+        self.name = name
+        self.label = STAGE_LABELS.get(name, name)
+        self.units = units
+        self.seconds = 0.0
+        self.rows = 0
+        self.lookups = 0
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'seconds': round(self.seconds, 6),
+            'rows': self.rows,
+            'lookups': self.lookups,
+            'input_items': self.units,
+        }
+
+
+class ConversionReport:
+    """Collects a :class:`StageTiming` per stage and reports progress.
+
+    ``progress`` is the usual ``callback(message, percent)``. Objects passed
+    to :meth:`watch` expose a ``lookups`` counter; the increase during a
+    stage is attributed to it.
+    """
+
+    def __init__(self, progress=None):
+        self.progress = progress
+        self.stages = []
+        self._planned = {}
+        self._watched = []
+        self._done_units = 0
+
+    def plan(self, units_by_stage):
+        """Expected amount of input per stage, used to weigh progress."""
+        # Never weigh a stage as zero, it still takes a little time
+        self._planned = {name: max(1, units) for name, units in units_by_stage.items()}
+
+    def watch(self, counter):
+        self._watched.append(counter)
+
+    def _lookups(self):
+        return sum(counter.lookups for counter in self._watched)
+
+    def _percent(self):
+        total = sum(self._planned.values())
+        if not total:
+            return 0
+        return min(100, int(100 * self._done_units / total))
+
+    def _report(self, message):
+        if self.progress:
+            self.progress(message, self._percent())
+
+    def _step(self, name):
+        # Number only the stages that are planned (optional ones may be skipped)
+        planned = [stage for stage, _ in STAGES if stage in self._planned]
+        if name in planned:
+            return planned.index(name) + 1, len(planned)
+        return STAGE_NUMBERS.get(name, '?'), len(STAGES)
+
+    @contextmanager
+    def stage(self, name):
+        timing = StageTiming(name, self._planned.get(name, 0))
+        number, total = self._step(name)
+        self._report(f"Step {number}/{total}: {timing.label}...")
+
+        lookups_before = self._lookups()
+        started = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            timing.seconds = time.perf_counter() - started
+            timing.lookups = self._lookups() - lookups_before
+            self.stages.append(timing)
+            self._done_units += self._planned.get(name, 0)
+
+    @property
+    def seconds(self):
+        return sum(timing.seconds for timing in self.stages)
+
+    def to_dict(self):
+        return {
+            'seconds': round(self.seconds, 6),
+            'stages': [timing.to_dict() for timing in self.stages],
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
@@ -0,0 +1,99 @@
+"""Multilingual text extraction.
+
+Tabesto stores translatable fields as ``{'data': [{'lang': 'fr_FR', 'text': ...}, ...]}``.
+:class:`LanguageConfig` pulls every configured language out of such a field
+in one walk over ``data``.
+"""
+
+DEFAULT_LANGUAGES = ('en_GB', 'es_ES', 'fr_FR')
+DEFAULT_LANGUAGE = 'fr_FR'
+
+
+class _BlankTexts:
+    # Stand-in for "no text in any language"; works for any language count
+    __slots__ = ()
+
+    def __getitem__(self, position):
+        return ''
+
+    def __repr__(self):
+        return 'BLANK_TEXTS'
+
+    def __reduce__(self):
+        # Stay a singleton across processes
+        return 'BLANK_TEXTS'
+
+
+BLANK_TEXTS = _BlankTexts()
+
+
+def column_suffix(language, languages):
+    """'en_GB' → 'en', unless another configured language shares the prefix."""
+    short = language.split('_')[0]
+    if sum(1 for other in languages if other.split('_')[0] == short) > 1:
+        return language
+    return short
+
+
+class LanguageConfig:
+    """Which languages get their own output column, and which one fills ``Name``.
+
+    ``default`` fills the plain ``Name``/``Description`` columns. When
+    ``fallback`` is set, a language missing from a field uses the fallback
+    language's text instead of staying blank.
+    """
+
+    def __init__(self, languages=DEFAULT_LANGUAGES, default=DEFAULT_LANGUAGE, fallback=None):
+        self.languages = tuple(languages)
+        self.default = default
+        self.fallback = fallback
+        self.suffixes = tuple(column_suffix(language, self.languages) for language in self.languages)
+
+        # Every language we have to find, in one lookup table
+        wanted = list(self.languages)
+        for language in (default, fallback):
+            if language and language not in wanted:
+                wanted.append(language)
+        self._wanted = frozenset(wanted)
+
+    def __eq__(self, other):
+        return isinstance(other, LanguageConfig) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self):
+        return (self.languages, self.default, self.fallback)
+
+    def _find(self, field):
+        found = {}
+        if field and 'data' in field:
+            wanted = self._wanted
+            remaining = len(wanted)
+            for item in field['data']:
+                lang = item.get('lang')
+                # First text for a language wins
+                if lang in wanted and lang not in found:
+                    # A JSON null text is a blank text, not the string 'None'
+                    text = item.get('text')
+                    found[lang] = '' if text is None else text
+                    remaining -= 1
+                    if not remaining:
+                        break
+        return found
+
+    def extract(self, field):
+        """Return ``(default_text, texts)`` with ``texts`` in :attr:`languages` order."""
+        found = self._find(field)
+        if not found:
+            return '', BLANK_TEXTS
+        fallback_text = found.get(self.fallback, '') if self.fallback else ''
+        texts = tuple(found.get(language, fallback_text) for language in self.languages)
+        return found.get(self.default, fallback_text), texts
+
+    def text(self, field):
+        """Text in the default language only."""
+        return self.extract(field)[0]
+
+
+DEFAULT_LANGUAGE_CONFIG = LanguageConfig()
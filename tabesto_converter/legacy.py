@@ -0,0 +1,421 @@
+"""The original single-pass conversion, kept as a reference.
+
+This is the conversion code of ``streamlit_app.py`` as it was before the
+engine existed, with only the Streamlit progress calls removed. It is
+quadratic in menu size and must not be optimised or "fixed": its whole
+point is to be the behaviour the engine is compared against, see
+:mod:`tabesto_converter.equivalence`.
+"""
+
+import json
+import re
+
+
+def legacy_convert(product_file, image_file):
+    """Convert PRODUCT/IMAGE export files the original way.
+
+    Returns the TSV text (without BOM) exactly as the original page built it.
+    """
+    # Load the JSON files
+    product_export_data = json.load(product_file)
+    image_data = json.load(image_file)
+
+    # Handle both file formats: with or without 'data' wrapper
+    # If there's a 'data' key at top level, unwrap it
+    if 'data' in product_export_data and 'reference' not in product_export_data:
+        product_export_data = product_export_data['data']
+
+    if 'data' in image_data and 'pictures' not in image_data:
+        image_data = image_data['data']
+
+    image_export_data = image_data.get('pictures', [])
+
+    output_data = []
+
+    # Helper function to find a specific language text
+    def get_lang_text(data, lang):
+        if data and 'data' in data:
+            for item in data['data']:
+                if item.get('lang') == lang:
+                    return item.get('text', '')
+        return ''
+
+    # Helper function to find Image URL and clean it
+    def get_image_url(image_ref_id, image_export_data):
+        if not image_ref_id:
+            return ''
+        for image in image_export_data:
+            if image.get('id') == image_ref_id:
+                image_url = image.get('url', '')
+                if image_url:
+                    return re.sub(r'(upload/).*?(tabesto/)', r'\1\2', image_url)
+        return ''
+
+    # Global constants
+    common_fields = {
+        'LocationID': 'All locations',
+        'LocationName': 'All locations',
+        'DeliveryTax': 10,
+        'TakeawayTax': 10,
+        'EatInTax': 10
+    }
+
+    def create_base_row():
+        return common_fields.copy()
+
+    # STEP 1: CREATE BUNDLE GROUPS FOR MEAL DEALS
+
+    bundle_groups = []
+    for meal_sequence in product_export_data.get('reference', {}).get('meal_sequence', []):
+        for step_index, item in enumerate(meal_sequence.get('items', [])):
+            bundle_group = create_base_row()
+            bundle_group['Name'] = 'Choose your option'
+            bundle_group['Name_en'] = ''  # Blank for bundles
+            bundle_group['Name_es'] = ''  # Blank for bundles
+            bundle_group['Name_fr'] = ''  # Blank for bundles
+
+            # Store original PLU (will be prefixed later based on output columns)
+            bundle_plu = f"{meal_sequence['id']}-{step_index}"
+            bundle_group['PLU'] = bundle_plu
+            bundle_group['Multiple'] = 1  # Always 1 for bundles
+
+            # Collect subproduct IDs (original IDs, will be mapped later)
+            choices = item.get('choices', [])
+            subproduct_ids = [str(choice.get('reference_id', '')) for choice in choices if choice.get('reference_id')]
+            products = item.get('product_suggestion', {}).get('products', [])
+            subproduct_ids.extend([str(p.get('reference_id', '')) for p in products if p.get('reference_id')])
+
+            bundle_group['Subproducts'] = ','.join(subproduct_ids)
+            bundle_group['Max'] = 1
+            bundle_group['Min'] = 1
+            bundle_group['Producttype'] = 'BUNDLE'
+            bundle_group['isCombo'] = ''
+            bundle_group['Isinternal'] = ''  # Blank for bundles
+            bundle_groups.append(bundle_group)
+
+    output_data.extend(bundle_groups)
+
+    # STEP 2: MEAL DEALS
+
+    for meal_sequence in product_export_data.get('reference', {}).get('meal_sequence', []):
+        row = create_base_row()
+        row['Name'] = get_lang_text(meal_sequence.get('name'), 'fr_FR')
+        row['Name_en'] = get_lang_text(meal_sequence.get('name'), 'en_GB')
+        row['Name_es'] = get_lang_text(meal_sequence.get('name'), 'es_ES')
+        row['Name_fr'] = get_lang_text(meal_sequence.get('name'), 'fr_FR')
+
+        # Store original PLU (will be prefixed later)
+        row['PLU'] = str(meal_sequence.get('id', ''))
+
+        miniature_picture_ref = None
+        for pic in meal_sequence.get('pictures', []):
+            if pic.get('type') == 'MINIATURE':
+                miniature_picture_ref = pic.get('reference_id', '')
+                break
+
+        row['ProductImageID'] = miniature_picture_ref or ''
+        row['Price'] = meal_sequence.get('price', 0) / 100 if meal_sequence.get('price') else ''
+
+        # Get matching bundle PLUs (original IDs, will be mapped later)
+        matching_bundles = [bg['PLU'] for bg in bundle_groups if bg['PLU'].startswith(f"{meal_sequence['id']}-")]
+        row['Subproducts'] = ','.join(matching_bundles)
+
+        product_ref = None
+        for product in product_export_data.get('reference', {}).get('product', []):
+            if product.get('id') == meal_sequence.get('id'):
+                product_ref = product
+                break
+
+        row['Description'] = get_lang_text(product_ref.get('description') if product_ref else None, 'fr_FR')
+        row['Description_en'] = get_lang_text(product_ref.get('description') if product_ref else None, 'en_GB')
+        row['Description_es'] = get_lang_text(product_ref.get('description') if product_ref else None, 'es_ES')
+        row['Description_fr'] = get_lang_text(product_ref.get('description') if product_ref else None, 'fr_FR')
+        row['ProductTags'] = ','.join(product_ref.get('allergens', [])) if product_ref else ''
+        row['Producttype'] = 'PRODUCT'
+        row['isCombo'] = 'TRUE'
+        row['Isinternal'] = 'TRUE'  # Set to TRUE when isCombo is TRUE
+        row['Imageurl'] = get_image_url(row.get('ProductImageID', ''), image_export_data)
+        row['Category'] = ''
+        output_data.append(row)
+
+    # STEP 3: PRODUCTS
+
+    for product in product_export_data.get('reference', {}).get('product', []):
+        row = create_base_row()
+        row['Name'] = get_lang_text(product.get('name'), 'fr_FR')
+        row['Name_en'] = get_lang_text(product.get('name'), 'en_GB')
+        row['Name_es'] = get_lang_text(product.get('name'), 'es_ES')
+        row['Name_fr'] = get_lang_text(product.get('name'), 'fr_FR')
+
+        # Store original PLU (will be prefixed later)
+        row['PLU'] = str(product.get('id', ''))
+
+        miniature_picture_ref = None
+        for pic in product.get('pictures', []):
+            if pic.get('type') == 'MINIATURE':
+                miniature_picture_ref = pic.get('reference_id', '')
+                break
+
+        row['ProductImageID'] = miniature_picture_ref or ''
+        row['Price'] = product.get('price', 0) / 100 if product.get('price') else ''
+
+        # Store original subproduct IDs (will be mapped later)
+        option_ids = [str(opt.get('reference_id', '')) for opt in product.get('options', []) if opt.get('reference_id')]
+        row['Subproducts'] = ','.join(option_ids)
+
+        row['Description'] = get_lang_text(product.get('description'), 'fr_FR')
+        row['Description_en'] = get_lang_text(product.get('description'), 'en_GB')
+        row['Description_es'] = get_lang_text(product.get('description'), 'es_ES')
+        row['Description_fr'] = get_lang_text(product.get('description'), 'fr_FR')
+
+        quantity_info = product.get('modifier_groups', {}).get('quantity_info', {}).get('quantity', {})
+        row['Max'] = quantity_info.get('max_permitted', '')
+        row['Min'] = quantity_info.get('min_permitted', '')
+        row['ProductTags'] = ','.join(product.get('allergens', []))
+        row['Producttype'] = 'PRODUCT'
+        row['isCombo'] = 'FALSE'
+        row['Isinternal'] = 'FALSE'  # FALSE for regular products
+        row['Imageurl'] = get_image_url(row.get('ProductImageID', ''), image_export_data)
+        row['Category'] = ''
+        output_data.append(row)
+
+    # STEP 4: MODIFIER
+
+    for choice in product_export_data.get('reference', {}).get('product_option_choice', []):
+        row = create_base_row()
+        row['Name'] = get_lang_text(choice.get('name'), 'fr_FR')
+        row['Name_en'] = get_lang_text(choice.get('name'), 'en_GB')
+        row['Name_es'] = get_lang_text(choice.get('name'), 'es_ES')
+        row['Name_fr'] = get_lang_text(choice.get('name'), 'fr_FR')
+
+        # Store original PLU (will be prefixed later)
+        row['PLU'] = str(choice.get('id', ''))
+
+        # Always set to 0 if no price for MODIFIER
+        row['Price'] = choice.get('price', 0) / 100 if choice.get('price') else 0
+
+        choice_ref = None
+        for pc in product_export_data.get('reference', {}).get('product_choice', []):
+            if pc.get('id') == choice.get('id'):
+                choice_ref = pc
+                break
+
+        row['ProductTags'] = ','.join(choice_ref.get('allergens', [])) if choice_ref else ''
+        row['Producttype'] = 'MODIFIER'
+        row['isCombo'] = 'FALSE'
+        row['Isinternal'] = ''  # Blank for modifiers
+        output_data.append(row)
+
+    # STEP 5: MODIFIER GROUP
+
+    for option in product_export_data.get('reference', {}).get('product_option', []):
+        row = create_base_row()
+        product_ref_for_name = None
+        for product in product_export_data.get('reference', {}).get('product', []):
+            if product.get('id') == option.get('id'):
+                product_ref_for_name = product
+                break
+
+        if product_ref_for_name:
+            row['Name'] = get_lang_text(product_ref_for_name.get('name'), 'fr_FR')
+        else:
+            row['Name'] = get_lang_text(option.get('name'), 'fr_FR')
+
+        row['Name_en'] = get_lang_text(option.get('name'), 'en_GB')
+        row['Name_es'] = get_lang_text(option.get('name'), 'es_ES')
+        row['Name_fr'] = get_lang_text(option.get('name'), 'fr_FR')
+
+        # Store original PLU (will be prefixed later)
+        row['PLU'] = str(option.get('id', ''))
+
+        # Store original subproduct IDs (will be mapped later)
+        choice_ids = [str(c.get('reference_id', '')) for c in option.get('choices', []) if c.get('reference_id')]
+        row['Subproducts'] = ','.join(choice_ids)
+
+        row['Max'] = option.get('max_allowed', '')
+        row['Min'] = option.get('min_required', '')
+        row['Producttype'] = 'MODIFIER_GROUP'
+        row['isUpsell'] = 'FALSE'
+        row['isCombo'] = ''
+        row['Isinternal'] = ''  # Blank for modifier groups
+        output_data.append(row)
+
+    # STEP 6: UPSELL GROUP
+
+    for suggestion in product_export_data.get('reference', {}).get('product_suggestion', []):
+        if suggestion.get('type') == 'ADDITIONAL':
+            row = create_base_row()
+            row['Name'] = get_lang_text(suggestion.get('name'), 'fr_FR')
+            row['Name_en'] = get_lang_text(suggestion.get('name'), 'en_GB')
+            row['Name_es'] = get_lang_text(suggestion.get('name'), 'es_ES')
+            row['Name_fr'] = get_lang_text(suggestion.get('name'), 'fr_FR')
+
+            # Store original PLU (will be prefixed later)
+            row['PLU'] = str(suggestion.get('id', ''))
+
+            # Store original subproduct IDs (will be mapped later)
+            product_ids = [str(p.get('reference_id', '')) for p in suggestion.get('products', []) if p.get('reference_id')]
+            row['Subproducts'] = ','.join(product_ids)
+
+            row['Max'] = 99
+            row['Min'] = 0
+            row['Producttype'] = 'MODIFIER_GROUP'
+            row['isUpsell'] = 'TRUE'
+            row['isCombo'] = ''
+            row['Isinternal'] = ''  # Blank for upsell groups
+            output_data.append(row)
+
+    # STEP 7: CATEGORY POPULATION
+
+    categories = {}
+    for category in product_export_data.get('reference', {}).get('category', []):
+        product_ids = tuple([str(p.get('reference_id', '')) for p in category.get('products', []) if p.get('reference_id')])
+        category_name = get_lang_text(category.get('name'), 'fr_FR')
+        categories[product_ids] = category_name
+
+    for row in output_data:
+        if row.get('Producttype') == 'PRODUCT' and row.get('PLU'):
+            found_category = ''
+            for product_ids, name in categories.items():
+                if str(row['PLU']) in product_ids:
+                    found_category = name
+                    break
+            row['Category'] = found_category
+
+    # STEP 8: APPLY PLU PREFIXES BASED ON OUTPUT COLUMNS
+
+    # PASS 1: Apply prefix to each row based on its OWN properties
+    for row in output_data:
+        original_plu = str(row.get('PLU', ''))
+        if not original_plu:
+            continue
+
+        producttype = row.get('Producttype', '')
+        is_combo = row.get('isCombo', '')
+        is_upsell = row.get('isUpsell', '')
+
+        # Determine prefix based on THIS row's columns
+        if producttype == 'MODIFIER':
+            row['PLU'] = f"M{original_plu}"
+        elif producttype == 'PRODUCT' and is_combo == 'FALSE':
+            row['PLU'] = f"P{original_plu}"
+        elif producttype == 'PRODUCT' and is_combo == 'TRUE':
+            row['PLU'] = f"MD{original_plu}"
+        elif producttype == 'MODIFIER_GROUP' and is_upsell == 'FALSE':
+            row['PLU'] = f"MG{original_plu}"
+        elif producttype == 'MODIFIER_GROUP' and is_upsell == 'TRUE':
+            row['PLU'] = f"UG{original_plu}"
+        elif producttype == 'BUNDLE':
+            row['PLU'] = original_plu  # Bundles don't get prefixed
+        else:
+            row['PLU'] = original_plu  # Default: no prefix
+
+    # PASS 2: Build map from original IDs to prefixed PLUs
+    # For subproduct references, we need to know: given an original ID, what are ALL the possible prefixed PLUs?
+    # Build reverse map: original_id -> list of prefixed PLUs
+    id_to_prefixed = {}
+    for row in output_data:
+        prefixed_plu = row.get('PLU', '')
+        # Extract original ID from prefixed PLU
+        original_id = prefixed_plu
+        if prefixed_plu.startswith('MD'):
+            original_id = prefixed_plu[2:]
+        elif prefixed_plu.startswith('MG') or prefixed_plu.startswith('UG'):
+            original_id = prefixed_plu[2:]
+        elif prefixed_plu.startswith('M') or prefixed_plu.startswith('P'):
+            original_id = prefixed_plu[1:]
+
+        if original_id:
+            if original_id not in id_to_prefixed:
+                id_to_prefixed[original_id] = []
+            if prefixed_plu not in id_to_prefixed[original_id]:
+                id_to_prefixed[original_id].append(prefixed_plu)
+
+    # PASS 3: Update Subproducts to use prefixed PLUs
+    # Rules for which prefix to use based on parent type:
+    # - BUNDLE → only P (products)
+    # - PRODUCT (isCombo=FALSE) → only MG (modifier groups)
+    # - PRODUCT (isCombo=TRUE) → only BUNDLE (unprefixed with '-')
+    # - MODIFIER_GROUP (isUpsell=FALSE) → only M (modifiers)
+    # - MODIFIER_GROUP (isUpsell=TRUE) → only P (products)
+
+    for row in output_data:
+        subproducts = row.get('Subproducts', '')
+        if not subproducts:
+            continue
+
+        producttype = row.get('Producttype', '')
+        is_combo = row.get('isCombo', '')
+        is_upsell = row.get('isUpsell', '')
+
+        original_ids = subproducts.split(',')
+        prefixed_ids = []
+
+        for orig_id in original_ids:
+            orig_id = orig_id.strip()
+            if orig_id in id_to_prefixed:
+                possible_plus = id_to_prefixed[orig_id]
+
+                # Filter based on parent type
+                if producttype == 'BUNDLE':
+                    # Bundles can only contain P-prefixed PLUs (products)
+                    matching = [p for p in possible_plus if p.startswith('P') and not p.startswith('MD')]
+                elif producttype == 'PRODUCT' and is_combo == 'FALSE':
+                    # Regular products can only contain MG-prefixed PLUs (modifier groups)
+                    matching = [p for p in possible_plus if p.startswith('MG')]
+                elif producttype == 'PRODUCT' and is_combo == 'TRUE':
+                    # Combo products can only contain BUNDLE PLUs (unprefixed with '-')
+                    matching = [p for p in possible_plus if '-' in p and not any(p.startswith(x) for x in ['P', 'M', 'UG'])]
+                elif producttype == 'MODIFIER_GROUP' and is_upsell == 'FALSE':
+                    # Modifier groups can only contain M-prefixed PLUs (modifiers)
+                    matching = [p for p in possible_plus if p.startswith('M') and not p.startswith('MG') and not p.startswith('MD')]
+                elif producttype == 'MODIFIER_GROUP' and is_upsell == 'TRUE':
+                    # Upsell groups can only contain P-prefixed PLUs (products)
+                    matching = [p for p in possible_plus if p.startswith('P') and not p.startswith('MD')]
+                else:
+                    matching = possible_plus
+
+                if matching:
+                    prefixed_ids.extend(matching)
+                else:
+                    # If no match found, keep original
+                    prefixed_ids.append(orig_id)
+            else:
+                # Keep original if not in map
+                prefixed_ids.append(orig_id)
+
+        row['Subproducts'] = ','.join(prefixed_ids)
+
+    # GENERATE OUTPUT with new order
+    output_headers = [
+        'Name', 'Name(en)', 'Name(es)', 'Name(fr)',
+        'LocationID', 'LocationName', 'Multiple(bundles)', 'PLU',
+        'Price', 'DeliveryTax', 'TakeawayTax', 'EatInTax',
+        'Subproducts', 'Imageurl',
+        'Description', 'Description(en)', 'Description(es)', 'Description(fr)',
+        'Max', 'Min', 'Isinternal(combos)',
+        'Category', 'ProductTags', 'Producttype',
+        'isCombo', 'isUpsell'
+    ]
+
+    header_to_key = {
+        'Name(en)': 'Name_en',
+        'Name(es)': 'Name_es',
+        'Name(fr)': 'Name_fr',
+        'Description(en)': 'Description_en',
+        'Description(es)': 'Description_es',
+        'Description(fr)': 'Description_fr',
+        'Multiple(bundles)': 'Multiple',
+        'Isinternal(combos)': 'Isinternal',
+    }
+
+    final_output = '\t'.join(output_headers) + '\n'
+    for row in output_data:
+        line_values = []
+        for header in output_headers:
+            key = header_to_key.get(header, header)
+            value = row.get(key, '')
+            line_values.append(str(value) if value is not None and value != '' else '')
+        final_output += '\t'.join(line_values) + '\n'
+
+    return final_output
@@ -0,0 +1,150 @@
+"""Per-location templates from one conversion.
+
+Chains import one template per location, differing only in the location
+columns, the tax rates and sometimes a few prices. The rows are converted
+once; each row is rendered once with placeholders in the location columns,
+and every location's line is that rendering with its own values spliced
+in. Only rows with a price override for a location are rendered again, for
+that location.
+"""
+
+import codecs
+import copy
+import csv
+import os
+
+from .languages import DEFAULT_LANGUAGE_CONFIG
+from .rows import COMMON_FIELDS, compile_line_renderer, output_headers
+from .writer import OUTPUT_FILE_NAME, _WRITE_BATCH, directory_name
+
+# Columns that vary per location, in output order
+LOCATION_FIELDS = ('LocationID', 'LocationName', 'DeliveryTax', 'TakeawayTax', 'EatInTax')
+
+# Stands in for the location columns in the shared rendering
+_SLOT = '\x00'
+
+
+class Location:
+    """One location: its id and name, tax rates and price overrides by PLU."""
+
+    def __init__(self, location_id, name, delivery_tax=10, takeaway_tax=10, eat_in_tax=10, prices=None):
+        self.location_id = location_id
+        self.name = name
+        self.delivery_tax = delivery_tax
+        self.takeaway_tax = takeaway_tax
+        self.eat_in_tax = eat_in_tax
+        self.prices = prices or {}
+
+    def constants(self):
+        """The location columns, shaped like :data:`COMMON_FIELDS`."""
+        return {
+            'LocationID': self.location_id,
+            'LocationName': self.name,
+            'DeliveryTax': self.delivery_tax,
+            'TakeawayTax': self.takeaway_tax,
+            'EatInTax': self.eat_in_tax,
+        }
+
+    def values(self):
+        return tuple('' if value is None else str(value) for value in self.constants().values())
+
+    @property
+    def directory_name(self):
+        # Location ids end up as directory names
+        return directory_name(self.location_id)
+
+
+def _tax(value):
+    value = (value or '').strip()
+    return value if value else COMMON_FIELDS['DeliveryTax']
+
+
+def read_locations(locations_file, prices_file=None):
+    """Read locations from CSV text files.
+
+    ``locations_file`` has ``id,name`` and optional ``delivery_tax``,
+    ``takeaway_tax`` and ``eat_in_tax`` columns (10 when blank).
+    ``prices_file`` has ``location,plu,price`` columns.
+    """
+    locations = []
+    for record in csv.DictReader(locations_file):
+        locations.append(Location(
+            record['id'].strip(),
+            record.get('name', '').strip() or record['id'].strip(),
+            _tax(record.get('delivery_tax')),
+            _tax(record.get('takeaway_tax')),
+            _tax(record.get('eat_in_tax')),
+        ))
+    if prices_file is not None:
+        by_id = {location.location_id: location for location in locations}
+        for record in csv.DictReader(prices_file):
+            location = by_id.get(record['location'].strip())
+            if location is None:
+                raise ValueError(f"Price override for unknown location {record['location']!r}")
+            location.prices[record['plu'].strip()] = record['price'].strip()
+    return locations
+
+
+def compile_location_renderer(locations, languages=DEFAULT_LANGUAGE_CONFIG):
+    """Build a ``render(row) -> [line per location]`` function."""
+    slots = dict.fromkeys(LOCATION_FIELDS, _SLOT)
+    render_shared = compile_line_renderer(languages, dict(COMMON_FIELDS, **slots))
+    values = [location.values() for location in locations]
+    render_full = [compile_line_renderer(languages, dict(COMMON_FIELDS, **location.constants())) for location in locations]
+
+    def render(row):
+        segments = render_shared(row).split(_SLOT)
+        # Unless the row's own text contains the placeholder character
+        shared = len(segments) == len(LOCATION_FIELDS) + 1
+        lines = []
+        for location, location_values, render_location in zip(locations, values, render_full):
+            if location.prices and row.PLU in location.prices:
+                overridden = copy.copy(row)
+                overridden.Price = location.prices[row.PLU]
+                lines.append(render_location(overridden))
+            elif shared:
+                parts = [segments[0]]
+                for value, segment in zip(location_values, segments[1:]):
+                    parts.append(value)
+                    parts.append(segment)
+                lines.append(''.join(parts))
+            else:
+                lines.append(render_location(row))
+        return lines
+
+    return render
+
+
+def write_location_tsvs(rows, locations, output_dir, languages=DEFAULT_LANGUAGE_CONFIG):
+    """Write ``<output_dir>/<location>/TAB_DLV_IMPORT_OUTPUT.tsv`` for every location in one pass over ``rows``.
+
+    Returns the paths written, in the order of ``locations``.
+    """
+    paths = [os.path.join(output_dir, location.directory_name, OUTPUT_FILE_NAME) for location in locations]
+    if len(set(paths)) != len(paths):
+        raise ValueError('Location ids must be unique')
+    for path in paths:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    render = compile_location_renderer(locations, languages)
+    header = '\t'.join(output_headers(languages)) + '\n'
+    files = []
+    try:
+        for path in paths:
+            fp = open(path, 'wb')
+            files.append(fp)
+            fp.write(codecs.BOM_UTF8)
+        batches = [[header] for _ in locations]
+        for count, row in enumerate(rows, 1):
+            for batch, line in zip(batches, render(row)):
+                batch.append(line)
+            if count % _WRITE_BATCH == 0:
+                for fp, batch in zip(files, batches):
+                    fp.write(''.join(batch).encode('utf-8'))
+                    batch.clear()
+        for fp, batch in zip(files, batches):
+            fp.write(''.join(batch).encode('utf-8'))
+    finally:
+        for fp in files:
+            fp.close()
+    return paths
@@ -0,0 +1,219 @@
+"""Declarative Tabesto → Deliverect field mapping.
+
+Each output entity type is described by an :class:`EntitySpec`: which
+reference array it reads, which ids it looks up in the index and which
+source feeds every output column. :func:`compile_builder` turns a spec
+into the Python source of a plain loop, once, so building rows runs no
+spec-interpreting code at all; adding a column or an entity type only adds
+a line to the generated function.
+"""
+
+from abc import ABC, abstractmethod
+
+from .rows import Row
+
+
+def get_miniature_ref(entity):
+    for pic in entity.get('pictures', []):
+        if pic.get('type') == 'MINIATURE':
+            return pic.get('reference_id', '')
+    return None
+
+
+# Sources. Each one turns into a Python expression over these names:
+# entity (the export item), row (the row being built), index, extract/text
+# (the language helpers), the spec's refs and bundles_by_meal.
+
+class Source(ABC):
+    @abstractmethod
+    def expression(self, compiler, target):
+        """Python expression for the ``target`` column."""
+
+
+class Constant(Source):
+    def __init__(self, value):
+        self.value = value
+
+    def expression(self, compiler, target):
+        return compiler.constant(self.value)
+
+
+def _path(compiler, path, default):
+    # ('a', 'b', 'c') → entity.get('a', {}).get('b', {}).get('c', default)
+    keys = (path,) if isinstance(path, str) else path
+    expression = 'entity'
+    for key in keys[:-1]:
+        expression += f'.get({key!r}, {{}})'
+    return expression + f'.get({keys[-1]!r}, {compiler.constant(default)})'
+
+
+class Value(Source):
+    """A value of the item at a key or key path."""
+
+    def __init__(self, path, default=''):
+        self.path = path
+        self.default = default
+
+    def expression(self, compiler, target):
+        return _path(compiler, self.path, self.default)
+
+
+class Texts(Source):
+    """``(default text, per-language texts)`` of a text field, for a ``(Name, Names)`` target."""
+
+    def __init__(self, key, ref=None):
+        self.key = key
+        self.ref = ref
+
+    def expression(self, compiler, target):
+        if self.ref:
+            return f'extract({self.ref}.get({self.key!r}) if {self.ref} else None)'
+        return f'extract(entity.get({self.key!r}))'
+
+
+class RefText(Source):
+    """Default-language text of a looked-up ``ref``; the column keeps its value when there is no ref."""
+
+    def __init__(self, ref, key):
+        self.ref = ref
+        self.key = key
+
+    def expression(self, compiler, target):
+        return f'text({self.ref}.get({self.key!r})) if {self.ref} else row.{target}'
+
+
+class Price(Source):
+    """A price in cents as a decimal price, ``missing`` when absent or zero."""
+
+    def __init__(self, key='price', missing=''):
+        self.key = key
+        self.missing = missing
+
+    def expression(self, compiler, target):
+        return f'entity.get({self.key!r}, 0) / 100 if entity.get({self.key!r}) else {compiler.constant(self.missing)}'
+
+
+class ReferenceIds(Source):
+    """Original ids of the ``reference_id`` items listed at one or more key paths."""
+
+    def __init__(self, *paths):
+        self.paths = paths
+
+    def expression(self, compiler, target):
+        return ' + '.join(
+            f"[str(r.get('reference_id', '')) for r in {_path(compiler, path, [])} if r.get('reference_id')]"
+            for path in self.paths
+        )
+
+
+class Allergens(Source):
+    def __init__(self, ref=None):
+        self.ref = ref
+
+    def expression(self, compiler, target):
+        if self.ref:
+            return f"','.join({self.ref}.get('allergens', [])) if {self.ref} else ''"
+        return "','.join(entity.get('allergens', []))"
+
+
+class Miniature(Source):
+    """Picture id of the item's MINIATURE picture."""
+
+    def expression(self, compiler, target):
+        return "get_miniature_ref(entity) or ''"
+
+
+class ImageUrl(Source):
+    """Cleaned URL of the picture id already stored in ``ProductImageID``."""
+
+    def expression(self, compiler, target):
+        return 'index.image_url(row.ProductImageID)'
+
+
+class MealBundles(Source):
+    """Original ids of the bundle groups created for a meal."""
+
+    def expression(self, compiler, target):
+        return "list(bundles_by_meal.get(str(entity['id']), []))"
+
+
+class EntitySpec:
+    """How one reference array becomes rows of one entity type.
+
+    ``refs`` are ``(name, index method)`` pairs looked up by the item's id
+    before the fields are filled in, ``where`` an optional ``(key, value)``
+    the item must have, and ``each`` the key of a list whose items each
+    become a row with id ``<item id>-<position>``. ``fields`` are
+    ``(column, source)`` pairs applied in order; a ``(column, column)``
+    target unpacks a :class:`Texts` source.
+    """
+
+    def __init__(self, entity_type, collection, fields, refs=(), where=None, each=None):
+        self.entity_type = entity_type
+        self.collection = collection
+        self.fields = fields
+        self.refs = refs
+        self.where = where
+        self.each = each
+
+
+class _Compiler:
+    def __init__(self):
+        self.namespace = {'Row': Row, 'get_miniature_ref': get_miniature_ref}
+
+    def constant(self, value):
+        # Literals are inlined (empty containers too, so each row gets its own)
+        if value is None or isinstance(value, (bool, int, float, str)) or value in ([], {}, ()):
+            return repr(value)
+        name = f'_constant{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+
+def builder_source(spec, compiler=None):
+    """Python source of the builder function for ``spec``."""
+    compiler = compiler or _Compiler()
+    lines = [
+        'def build(index, bundles_by_meal=None):',
+        '    extract = index.languages.extract',
+        '    text = index.languages.text',
+        '    rows = []',
+        '    append = rows.append',
+    ]
+    indent = '        '
+    if spec.each:
+        lines.append(f'    for parent in index.entities({spec.collection!r}):')
+        lines.append(f"        for position, entity in enumerate(parent.get({spec.each!r}, [])):")
+        indent += '    '
+        row_id = "f\"{parent['id']}-{position}\""
+    else:
+        lines.append(f'    for entity in index.entities({spec.collection!r}):')
+        row_id = "str(entity.get('id', ''))"
+    if spec.where:
+        key, value = spec.where
+        lines.append(f'{indent}if entity.get({key!r}) != {compiler.constant(value)}:')
+        lines.append(f'{indent}    continue')
+    lines.append(f'{indent}row = Row({spec.entity_type!r}, {row_id})')
+    for name, method in spec.refs:
+        lines.append(f"{indent}{name} = index.{method}(entity.get('id'))")
+    for target, source in spec.fields:
+        if isinstance(target, tuple):
+            columns = ', '.join(f'row.{column}' for column in target)
+            lines.append(f'{indent}{columns} = {source.expression(compiler, target[0])}')
+        else:
+            lines.append(f'{indent}row.{target} = {source.expression(compiler, target)}')
+    lines.append(f'{indent}append(row)')
+    lines.append('    return rows')
+    return '\n'.join(lines) + '\n'
+
+
+def compile_builder(spec):
+    """Compile ``spec`` into a ``build(index, bundles_by_meal=None) -> rows`` function."""
+    compiler = _Compiler()
+    source = builder_source(spec, compiler)
+    code = compile(source, f'<{spec.entity_type.lower()} builder>', 'exec')
+    exec(code, compiler.namespace)
+    build = compiler.namespace['build']
+    build.source = source
+    build.__name__ = f'build_{spec.collection}'
+    return build
@@ -0,0 +1,68 @@
+"""Typed PLU namespaces.
+
+Every output row belongs to one entity type, and each type owns a PLU
+prefix so that ids coming from different Tabesto tables can't collide in
+Deliverect. The resolver remembers which (entity type, original id) pairs
+were emitted, so subproduct references are resolved with one dict lookup
+instead of re-parsing prefixed PLU strings.
+"""
+
+# Entity types
+BUNDLE = 'BUNDLE'
+MEAL_DEAL = 'MEAL_DEAL'
+PRODUCT = 'PRODUCT'
+MODIFIER = 'MODIFIER'
+MODIFIER_GROUP = 'MODIFIER_GROUP'
+UPSELL_GROUP = 'UPSELL_GROUP'
+
+PLU_PREFIXES = {
+    BUNDLE: '',  # Bundles don't get prefixed
+    MEAL_DEAL: 'MD',
+    PRODUCT: 'P',
+    MODIFIER: 'M',
+    MODIFIER_GROUP: 'MG',
+    UPSELL_GROUP: 'UG',
+}
+
+# Which entity type the subproducts of each parent type refer to:
+# - BUNDLE → only P (products)
+# - PRODUCT (isCombo=FALSE) → only MG (modifier groups)
+# - PRODUCT (isCombo=TRUE) → only BUNDLE (unprefixed with '-')
+# - MODIFIER_GROUP (isUpsell=FALSE) → only M (modifiers)
+# - MODIFIER_GROUP (isUpsell=TRUE) → only P (products)
+CHILD_TYPES = {
+    BUNDLE: PRODUCT,
+    PRODUCT: MODIFIER_GROUP,
+    MEAL_DEAL: BUNDLE,
+    MODIFIER_GROUP: MODIFIER,
+    UPSELL_GROUP: PRODUCT,
+}
+
+
+class PluResolver:
+    """Records the PLU of every (entity type, original id) as rows are created."""
+
+    def __init__(self):
+        self._plus = {}
+        self.lookups = 0
+
+    def __len__(self):
+        return len(self._plus)
+
+    def register(self, entity_type, original_id):
+        """Return the prefixed PLU for ``original_id`` and remember it.
+
+        Empty ids stay empty and are not registered.
+        """
+        if not original_id:
+            return original_id
+        plu = PLU_PREFIXES[entity_type] + original_id
+        self._plus[(entity_type, original_id)] = plu
+        return plu
+
+    def resolve_all(self, parent_type, child_ids):
+        """PLUs for ``child_ids``; unknown ids are kept as they are."""
+        plus = self._plus
+        child_type = CHILD_TYPES[parent_type]
+        self.lookups += len(child_ids)
+        return [plus.get((child_type, child_id), child_id) for child_id in child_ids]
@@ -0,0 +1,119 @@
+"""Compact output row.
+
+A 100k-row menu used to mean 100k dicts each repeating the constant
+location/tax columns. Rows are now ``__slots__`` records holding only the
+per-row columns; the constant columns live once in ``COMMON_FIELDS`` and
+are baked into the line renderer.
+"""
+
+from operator import attrgetter
+
+from .languages import BLANK_TEXTS, DEFAULT_LANGUAGE_CONFIG
+
+
+def output_headers(languages=DEFAULT_LANGUAGE_CONFIG):
+    """Output column order, with one Name/Description column per language."""
+    return [
+        'Name', *[f'Name({suffix})' for suffix in languages.suffixes],
+        'LocationID', 'LocationName', 'Multiple(bundles)', 'PLU',
+        'Price', 'DeliveryTax', 'TakeawayTax', 'EatInTax',
+        'Subproducts', 'Imageurl',
+        'Description', *[f'Description({suffix})' for suffix in languages.suffixes],
+        'Max', 'Min', 'Isinternal(combos)',
+        'Category', 'ProductTags', 'Producttype',
+        'isCombo', 'isUpsell'
+    ]
+
+
+OUTPUT_HEADERS = output_headers()
+
+HEADER_TO_KEY = {
+    'Multiple(bundles)': 'Multiple',
+    'Isinternal(combos)': 'Isinternal',
+}
+
+# Global constants
+COMMON_FIELDS = {
+    'LocationID': 'All locations',
+    'LocationName': 'All locations',
+    'DeliveryTax': 10,
+    'TakeawayTax': 10,
+    'EatInTax': 10
+}
+
+# Per-row output columns. Names/Descriptions hold one text per configured language.
+ROW_FIELDS = (
+    'Name', 'Names', 'Multiple', 'PLU', 'Price', 'Subproducts', 'Imageurl',
+    'Description', 'Descriptions', 'Max', 'Min', 'Isinternal',
+    'Category', 'ProductTags', 'Producttype', 'isCombo', 'isUpsell',
+)
+
+# Bookkeeping that is never written out
+INTERNAL_FIELDS = ('EntityType', 'SourceID', 'SubproductIds', 'ProductImageID')
+
+
+class Row:
+    __slots__ = ROW_FIELDS + INTERNAL_FIELDS
+
+    def __init__(self, entity_type='', source_id=''):
+        for field in ROW_FIELDS:
+            setattr(self, field, '')
+        self.Names = BLANK_TEXTS
+        self.Descriptions = BLANK_TEXTS
+        self.EntityType = entity_type
+        self.SourceID = source_id
+        self.SubproductIds = ()
+        self.ProductImageID = ''
+
+    def __repr__(self):
+        return f"Row({self.EntityType!r}, {self.SourceID!r}, PLU={self.PLU!r})"
+
+
+def _language_column(header, languages):
+    # 'Name(en)' → ('Names', 0)
+    for field, texts in (('Name', 'Names'), ('Description', 'Descriptions')):
+        for position, suffix in enumerate(languages.suffixes):
+            if header == f'{field}({suffix})':
+                return texts, position
+    return None
+
+
+def compile_line_renderer(languages=DEFAULT_LANGUAGE_CONFIG, constants=COMMON_FIELDS):
+    """Build a ``render(row) -> str`` function for one TSV line.
+
+    Header → attribute remapping, language columns and the constant columns
+    are resolved here, once, so rendering a row is a single attrgetter call
+    plus a format.
+    """
+    parts = []
+    keys = []
+    for header in output_headers(languages):
+        key = HEADER_TO_KEY.get(header, header)
+        if key in constants:
+            value = constants[key]
+            parts.append('' if value is None else str(value).replace('{', '{{').replace('}', '}}'))
+            continue
+
+        language_column = _language_column(header, languages)
+        if language_column:
+            key, position = language_column
+        if key not in keys:
+            keys.append(key)
+        if language_column:
+            parts.append(f'{{{keys.index(key)}[{position}]}}')
+        else:
+            parts.append(f'{{{keys.index(key)}}}')
+    template = '\t'.join(parts) + '\n'
+
+    if not keys:
+        line = template.format()
+        return lambda row: line
+    get_values = attrgetter(*keys)
+    if len(keys) == 1:
+        get_one = get_values
+        get_values = lambda row: (get_one(row),)  # noqa: E731
+
+    def render(row):
+        return template.format(*['' if value is None else value for value in get_values(row)])
+
+    return render
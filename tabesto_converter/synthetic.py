@@ -0,0 +1,179 @@
+"""Synthetic Tabesto exports for benchmarks and equivalence checks.
+
+The generated payloads have the same shape as real PRODUCT/IMAGE exports
+(only the fields the converter reads) and are fully determined by the
+size and the seed.
+"""
+
+import json
+import random
+
+LANGUAGES = ('fr_FR', 'en_GB', 'es_ES')
+ALLERGENS = ('gluten', 'milk', 'egg', 'nuts', 'peanuts', 'soy', 'fish', 'celery', 'mustard', 'sesame')
+PRICES = (0, 150, 250, 450, 890, 1090, 1290, 1450, 1990)
+
+
+def _text(label, lang, rng):
+    # ... and some translations are null or have no text at all
+    roll = rng.random()
+    if roll < 0.03:
+        return {'lang': lang, 'text': None}
+    if roll < 0.05:
+        return {'lang': lang}
+    return {'lang': lang, 'text': f'{label} {lang[:2]}'}
+
+
+def _texts(label, rng, languages=LANGUAGES):
+    # Real exports often miss a translation or two
+    return {'data': [
+        _text(label, lang, rng)
+        for lang in languages if lang == 'fr_FR' or rng.random() < 0.85
+    ]}
+
+
+def _mixed_id(number, rng):
+    # Ids are mostly numbers, sometimes numeric strings or SKU-like strings with '-'
+    roll = rng.random()
+    if roll < 0.1:
+        return str(number)
+    if roll < 0.15:
+        return f'SKU-{number}'
+    return number
+
+
+def _reference(entity_id, rng):
+    # References to a numeric id are sometimes strings
+    if isinstance(entity_id, int) and rng.random() < 0.1:
+        return {'reference_id': str(entity_id)}
+    return {'reference_id': entity_id}
+
+
+def _picture_ref(picture_id, rng):
+    pictures = [{'type': 'MINIATURE', 'reference_id': picture_id}]
+    if rng.random() < 0.3:
+        pictures.insert(0, {'type': 'BACKGROUND', 'reference_id': picture_id + 1})
+    return pictures
+
+
+def generate_menu(products=1000, seed=0, options_per_product=1.5, choices_per_option=4,
+                  meals_ratio=0.1, categories=None, suggestions_ratio=0.05):
+    """Return ``(product_export, image_export)`` in the wrapped (``data``) layout.
+
+    ``products`` drives the size; every other entity count is derived from
+    it with the given ratios. Like real exports, some texts are null or
+    missing, some ``max_permitted`` are null and ids mix numbers, numeric
+    strings and ids containing ``-``.
+    """
+    rng = random.Random(seed)
+    next_id = iter(range(100000, 10 ** 9)).__next__
+    reference = {
+        'meal_sequence': [], 'product': [], 'product_option': [], 'product_option_choice': [],
+        'product_choice': [], 'product_suggestion': [], 'category': [],
+    }
+    pictures = []
+
+    def new_picture():
+        picture_id = next_id()
+        next_id()  # keep room for the BACKGROUND picture
+        if rng.random() < 0.95:
+            pictures.append({
+                'id': picture_id,
+                'url': f'https://res.cloudinary.com/tabesto/image/upload/c_fill,w_{rng.choice((200, 400))}/v{rng.randint(1, 9)}/tabesto/menu/{picture_id}.jpg',
+            })
+        return picture_id
+
+    # Modifier groups and their choices
+    option_count = max(1, int(products * options_per_product / 3))
+    for _ in range(option_count):
+        option_id = _mixed_id(next_id(), rng)
+        choices = []
+        for _ in range(rng.randint(1, max(1, int(choices_per_option * 2) - 1))):
+            choice_id = _mixed_id(next_id(), rng)
+            reference['product_option_choice'].append({
+                'id': choice_id,
+                'name': _texts(f'Choice {choice_id}', rng),
+                'price': rng.choice(PRICES[:4]),
+            })
+            if rng.random() < 0.6:
+                reference['product_choice'].append({
+                    'id': choice_id,
+                    'allergens': rng.sample(ALLERGENS, rng.randint(0, 2)),
+                })
+            choices.append(_reference(choice_id, rng))
+        min_required = rng.choice((0, 0, 1))
+        reference['product_option'].append({
+            'id': option_id,
+            'name': _texts(f'Option {option_id}', rng),
+            'choices': choices,
+            'min_required': min_required,
+            'max_allowed': rng.randint(max(1, min_required), max(1, len(choices))),
+        })
+
+    # Products
+    for _ in range(products):
+        product_id = _mixed_id(next_id(), rng)
+        product = {
+            'id': product_id,
+            'name': _texts(f'Product {product_id}', rng),
+            'description': _texts(f'Description of {product_id}', rng) if rng.random() < 0.7 else None,
+            'price': rng.choice(PRICES),
+            'allergens': rng.sample(ALLERGENS, rng.randint(0, 3)),
+            'pictures': _picture_ref(new_picture(), rng) if rng.random() < 0.9 else [],
+            'options': [
+                _reference(option['id'], rng)
+                for option in rng.sample(reference['product_option'], min(len(reference['product_option']), rng.randint(0, 3)))
+            ],
+            'modifier_groups': {},
+        }
+        if product['options'] and rng.random() < 0.5:
+            product['modifier_groups'] = {'quantity_info': {'quantity': {
+                'min_permitted': 0, 'max_permitted': len(product['options']) if rng.random() < 0.9 else None,
+            }}}
+        reference['product'].append(product)
+
+    # Upsell groups
+    for _ in range(max(1, int(products * suggestions_ratio))):
+        suggestion_id = _mixed_id(next_id(), rng)
+        reference['product_suggestion'].append({
+            'id': suggestion_id,
+            'type': 'ADDITIONAL' if rng.random() < 0.7 else 'MEAL',
+            'name': _texts(f'Suggestion {suggestion_id}', rng),
+            'products': [_reference(p['id'], rng) for p in rng.sample(reference['product'], min(products, rng.randint(1, 6)))],
+        })
+
+    # Meal deals: a meal shares its id with a product, like in real exports
+    for product in rng.sample(reference['product'], int(products * meals_ratio)):
+        items = []
+        for _ in range(rng.randint(1, 4)):
+            item = {'choices': [_reference(p['id'], rng) for p in rng.sample(reference['product'], min(products, rng.randint(2, 8)))]}
+            if rng.random() < 0.3:
+                item['product_suggestion'] = {'products': [_reference(p['id'], rng) for p in rng.sample(reference['product'], min(products, 2))]}
+            items.append(item)
+        reference['meal_sequence'].append({
+            'id': product['id'],
+            'name': _texts(f'Menu {product["id"]}', rng),
+            'price': rng.choice(PRICES[4:]),
+            'pictures': _picture_ref(new_picture(), rng),
+            'items': items,
+        })
+
+    # Categories partition the products, so no two have the same product list
+    category_count = categories or max(1, products // 25)
+    shuffled = list(reference['product'])
+    rng.shuffle(shuffled)
+    for position in range(category_count):
+        members = shuffled[position::category_count]
+        reference['category'].append({
+            'id': next_id(),
+            'name': _texts(f'Category {position}', rng),
+            'products': [_reference(p['id'], rng) for p in members],
+        })
+
+    rng.shuffle(pictures)
+    return {'data': {'reference': reference}}, {'data': {'pictures': pictures}}
+
+
+def generate_menu_bytes(products=1000, seed=0, **options):
+    """Like :func:`generate_menu` but already serialized, as uploads would be."""
+    product_export, image_export = generate_menu(products, seed, **options)
+    return json.dumps(product_export).encode('utf-8'), json.dumps(image_export).encode('utf-8')
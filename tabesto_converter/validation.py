@@ -0,0 +1,171 @@
+"""Referential integrity checks on converted rows.
+
+Subproduct ids that don't resolve to a PLU used to be written out as they
+are, and broken bundles or modifier groups only showed up when the
+Deliverect import failed. :func:`validate_rows` builds the
+meal → bundle → product → modifier group → modifier graph once from the
+rows and checks it in time linear in rows + references.
+
+There is no cycle check: every row only lists children of the next type
+down (meal → bundle → product → modifier group → modifier, upsell group →
+product), so the output can't loop. What comes closest is a meal offering
+the product that stands for it on the menu (they share an id); it is
+reported as a warning, which strict mode doesn't fail on.
+"""
+
+import json
+
+from .plu import BUNDLE, CHILD_TYPES, MEAL_DEAL, MODIFIER_GROUP, PRODUCT, UPSELL_GROUP
+
+# Issue kinds
+DANGLING_REFERENCE = 'dangling_reference'
+WRONG_TYPE_CHILD = 'wrong_type_child'
+EMPTY_GROUP = 'empty_group'
+MIN_MAX = 'min_max'
+OWN_PRODUCT = 'own_product'
+ISSUE_KINDS = (DANGLING_REFERENCE, WRONG_TYPE_CHILD, EMPTY_GROUP, MIN_MAX, OWN_PRODUCT)
+# Kinds reported without making the menu invalid
+WARNING_KINDS = (OWN_PRODUCT,)
+
+ISSUE_LABELS = {
+    DANGLING_REFERENCE: 'Dangling references',
+    WRONG_TYPE_CHILD: 'Wrong-type children',
+    EMPTY_GROUP: 'Empty groups',
+    MIN_MAX: 'Min/Max inconsistencies',
+    OWN_PRODUCT: 'Meals offering their own product',
+}
+
+# What conversion does with the result:
+# - off    → no validation
+# - report → validate and attach the report to the result
+# - strict → raise ValidationError before any output is generated
+VALIDATION_MODES = ('off', 'report', 'strict')
+
+# Rows that only make sense with at least one child
+GROUP_TYPES = (BUNDLE, MEAL_DEAL, MODIFIER_GROUP, UPSELL_GROUP)
+
+
+class ValidationError(Exception):
+    def __init__(self, report):
+        counts = ', '.join(
+            f'{count} {kind}' for kind, count in report.counts().items() if count and kind not in WARNING_KINDS
+        )
+        super().__init__(f'Menu validation failed: {counts}')
+        self.report = report
+
+
+class ValidationReport:
+    """Issues found in a set of rows, each a dict with ``kind``, ``plu`` and ``detail``.
+
+    The report is ``ok`` as long as every issue is a warning (see :data:`WARNING_KINDS`).
+    """
+
+    def __init__(self, rows_checked=0, references_checked=0):
+        self.issues = []
+        self.rows_checked = rows_checked
+        self.references_checked = references_checked
+
+    def add(self, kind, row, detail):
+        self.issues.append({
+            'kind': kind,
+            'plu': row.PLU,
+            'producttype': row.Producttype,
+            'name': row.Name,
+            'detail': detail,
+        })
+
+    @property
+    def ok(self):
+        return all(issue['kind'] in WARNING_KINDS for issue in self.issues)
+
+    def counts(self):
+        counts = dict.fromkeys(ISSUE_KINDS, 0)
+        for issue in self.issues:
+            counts[issue['kind']] += 1
+        return counts
+
+    def to_dict(self):
+        return {
+            'ok': self.ok,
+            'rows_checked': self.rows_checked,
+            'references_checked': self.references_checked,
+            'counts': self.counts(),
+            'issues': self.issues,
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), ensure_ascii=False, **kwargs)
+
+
+def _bound(value):
+    # Min/Max are ints from the export, or '' when not set
+    if value == '' or value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError
+    return value
+
+
+def _check_min_max(report, row, children):
+    try:
+        minimum = _bound(row.Min)
+        maximum = _bound(row.Max)
+    except ValueError:
+        report.add(MIN_MAX, row, f'Min {row.Min!r} / Max {row.Max!r} is not a number')
+        return
+    if (minimum is not None and minimum < 0) or (maximum is not None and maximum < 0):
+        report.add(MIN_MAX, row, f'negative Min {row.Min!r} / Max {row.Max!r}')
+    elif minimum is not None and maximum is not None and minimum > maximum:
+        report.add(MIN_MAX, row, f'Min {minimum} is greater than Max {maximum}')
+    elif minimum is not None and row.EntityType in GROUP_TYPES and 0 < children < minimum:
+        report.add(MIN_MAX, row, f'Min {minimum} but only {children} option(s) to choose from')
+
+
+def _check_own_products(report, nodes, edges):
+    # A product with the same id as a meal is that meal on the menu
+    for meal_key in edges:
+        if meal_key[0] != MEAL_DEAL:
+            continue
+        own_product = (PRODUCT, meal_key[1])
+        for bundle_key in dict.fromkeys(edges[meal_key]):
+            if own_product in edges.get(bundle_key, ()):
+                report.add(OWN_PRODUCT, nodes[meal_key],
+                           f'{nodes[bundle_key].PLU} offers {nodes[own_product].PLU}, the product of this meal')
+
+
+def validate_rows(rows):
+    """Check the subproduct graph of converted rows and return a :class:`ValidationReport`.
+
+    Works on the original subproduct ids kept on every row, so it can run
+    before or after PLU resolution.
+    """
+    nodes = {}
+    types_by_id = {}
+    for row in rows:
+        if row.SourceID:
+            nodes.setdefault((row.EntityType, row.SourceID), row)
+            types_by_id.setdefault(row.SourceID, set()).add(row.EntityType)
+
+    report = ValidationReport(rows_checked=len(rows))
+    edges = {}
+    for row in rows:
+        child_type = CHILD_TYPES.get(row.EntityType)
+        children = 0
+        for child_id in row.SubproductIds:
+            report.references_checked += 1
+            child = (child_type, child_id)
+            if child in nodes:
+                children += 1
+                edges.setdefault((row.EntityType, row.SourceID), []).append(child)
+            elif child_id in types_by_id:
+                found = ', '.join(sorted(types_by_id[child_id]))
+                report.add(WRONG_TYPE_CHILD, row, f'{child_id!r} is a {found}, expected a {child_type}')
+            else:
+                report.add(DANGLING_REFERENCE, row, f'{child_id!r} does not match any {child_type}')
+
+        if row.EntityType in GROUP_TYPES and not children:
+            report.add(EMPTY_GROUP, row, 'no subproducts' if not row.SubproductIds else 'no subproduct resolves')
+        _check_min_max(report, row, children)
+
+    _check_own_products(report, nodes, edges)
+    return report
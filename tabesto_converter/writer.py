@@ -0,0 +1,58 @@
+import codecs
+import re
+
+from .compression import open_output
+from .languages import DEFAULT_LANGUAGE_CONFIG
+from .rows import compile_line_renderer, output_headers
+
+OUTPUT_FILE_NAME = 'TAB_DLV_IMPORT_OUTPUT.tsv'
+PREVIEW_ROWS = 10
+
+# Lines are encoded and written in batches to keep the number of write() calls low
+_WRITE_BATCH = 1000
+
+
+def directory_name(name):
+    """``name`` (a site or location id) as a single directory name.
+
+    Anything but letters, digits, ``.``, ``_`` and ``-`` becomes ``_`` and
+    leading/trailing dots are dropped, so the result never contains a path
+    separator and is never ``.`` or ``..``.
+    """
+    return re.sub(r'[^\w.-]+', '_', str(name)).strip('.') or '_'
+
+
+def iter_tsv_lines(rows, languages=DEFAULT_LANGUAGE_CONFIG):
+    """Yield the header line followed by one TSV line per row."""
+    render = compile_line_renderer(languages)
+    yield '\t'.join(output_headers(languages)) + '\n'
+    for row in rows:
+        yield render(row)
+
+
+def write_tsv(rows, fp, preview_rows=PREVIEW_ROWS, languages=DEFAULT_LANGUAGE_CONFIG):
+    """Stream the TSV for ``rows`` as UTF-8 with BOM into the binary file ``fp``.
+
+    Each line is encoded exactly once and never kept around, except for the
+    header and the first ``preview_rows`` rows which are returned as the
+    preview text.
+    """
+    fp.write(codecs.BOM_UTF8)
+    preview = []
+    batch = []
+    for line in iter_tsv_lines(rows, languages):
+        if len(preview) <= preview_rows:
+            preview.append(line)
+        batch.append(line)
+        if len(batch) >= _WRITE_BATCH:
+            fp.write(''.join(batch).encode('utf-8'))
+            batch = []
+    if batch:
+        fp.write(''.join(batch).encode('utf-8'))
+    return ''.join(preview).rstrip('\n')
+
+
+def write_tsv_file(rows, path, preview_rows=PREVIEW_ROWS, languages=DEFAULT_LANGUAGE_CONFIG):
+    """:func:`write_tsv` to ``path``, gzip/zip-compressed on the fly for ``.gz``/``.zip`` paths."""
+    with open_output(path, OUTPUT_FILE_NAME) as fp:
+        return write_tsv(rows, fp, preview_rows, languages)
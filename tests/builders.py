@@ -0,0 +1,29 @@
+"""Builders for the small PRODUCT/IMAGE exports the tests convert."""
+
+import io
+import json
+
+
+def texts(fr):
+    return {'data': [{'lang': 'fr_FR', 'text': fr}]}
+
+
+def refs(*ids):
+    return [{'reference_id': entity_id} for entity_id in ids]
+
+
+def product(product_id, name, **fields):
+    return {'id': product_id, 'name': texts(name), **fields}
+
+
+def product_export(**reference):
+    return {'reference': reference}
+
+
+def export_file(export_data):
+    """Binary file holding ``export_data`` as JSON, like an upload."""
+    return io.BytesIO(json.dumps(export_data).encode())
+
+
+def image_file(*pictures):
+    return export_file({'pictures': list(pictures)})
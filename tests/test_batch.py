@@ -0,0 +1,64 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+from builders import export_file, image_file, product, product_export
+from tabesto_converter.batch import SUMMARY_FILE_NAME, Site, discover_sites, read_manifest, run_batch
+
+
+def write_site(directory, *names):
+    os.makedirs(directory, exist_ok=True)
+    products = [product(str(position), name) for position, name in enumerate(names, 1)]
+    with open(os.path.join(directory, 'PRODUCT_EXPORT.json'), 'wb') as fp:
+        fp.write(export_file(product_export(product=products)).getvalue())
+    with open(os.path.join(directory, 'IMAGE_EXPORT.json'), 'wb') as fp:
+        fp.write(image_file().getvalue())
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_failing_sites_are_reported_without_stopping_the_others(tmp_path, workers):
+    input_dir = tmp_path / 'in'
+    write_site(input_dir / 'good', 'Burger', 'Fries')
+    write_site(input_dir / 'broken', 'Burger')
+    (input_dir / 'broken' / 'PRODUCT_EXPORT.json').write_bytes(b'{"reference": ')
+    (input_dir / 'incomplete').mkdir()
+
+    summary = run_batch(discover_sites(str(input_dir)), str(tmp_path / 'out'), workers=workers)
+    broken, good, incomplete = summary['results']
+    assert (summary['succeeded'], summary['failed'], summary['rows']) == (1, 2, 2)
+    assert broken['error'].startswith('JSONDecodeError')
+    assert incomplete['error'].startswith('FileNotFoundError')
+    assert good['output'] == str(tmp_path / 'out' / 'good' / 'TAB_DLV_IMPORT_OUTPUT.tsv')
+    with open(tmp_path / 'out' / SUMMARY_FILE_NAME, encoding='utf-8') as fp:
+        assert json.load(fp)['failed'] == 2
+
+
+def test_unsafe_manifest_site_names_stay_inside_the_output_directory(tmp_path):
+    write_site(tmp_path / 'exports', 'Burger')
+    manifest = tmp_path / 'manifest.csv'
+    manifest.write_text(
+        'site,product,image\n'
+        '../x,exports/PRODUCT_EXPORT.json,exports/IMAGE_EXPORT.json\n'
+        '..,exports/PRODUCT_EXPORT.json,exports/IMAGE_EXPORT.json\n',
+        encoding='utf-8',
+    )
+    output_dir = tmp_path / 'out'
+    archive = tmp_path / 'sites.zip'
+
+    summary = run_batch(read_manifest(str(manifest)), str(output_dir), workers=1, archive=str(archive))
+    assert summary['succeeded'] == 2
+    for report in summary['results']:
+        site_dir = os.path.dirname(os.path.realpath(report['output']))
+        assert os.path.dirname(site_dir) == os.path.realpath(output_dir)
+    with zipfile.ZipFile(archive) as zipped:
+        assert sorted(zipped.namelist()) == ['_/TAB_DLV_IMPORT_OUTPUT.tsv', '_x/TAB_DLV_IMPORT_OUTPUT.tsv']
+
+
+@pytest.mark.parametrize('names', [('paris', 'paris'), ('a/b', 'a_b')])
+def test_sites_writing_to_the_same_directory_are_rejected(tmp_path, names):
+    sites = [Site(name, 'PRODUCT_EXPORT.json', 'IMAGE_EXPORT.json') for name in names]
+    with pytest.raises(ValueError, match='unique'):
+        run_batch(sites, str(tmp_path / 'out'), workers=1)
+    assert not (tmp_path / 'out').exists()
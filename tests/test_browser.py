@@ -0,0 +1,59 @@
+from tabesto_converter import ResultBrowser, Row
+from tabesto_converter.plu import MODIFIER, PRODUCT
+
+
+def row(entity_type, plu, name, producttype, category=''):
+    row = Row(entity_type, plu)
+    row.PLU, row.Name, row.Producttype, row.Category = plu, name, producttype, category
+    return row
+
+
+ROWS = [
+    row(PRODUCT, 'P1', 'Cheese Burger', 1, 'Burgers'),
+    row(PRODUCT, 'P2', 'Fries', 1, 'Sides'),
+    row(MODIFIER, 'M3', 'Extra cheese', 2),
+    row(PRODUCT, 'P4', 'Double Cheese Burger', 1, 'Burgers'),
+    row(PRODUCT, 'P5', 'Soda', 1, 'Drinks'),
+]
+
+
+def plus(browser, positions):
+    return [browser.rows[position].PLU for position in positions]
+
+
+def test_filters_are_combined():
+    browser = ResultBrowser(ROWS)
+    assert plus(browser, browser.query(producttype=1, category='Burgers')) == ['P1', 'P4']
+    assert plus(browser, browser.query(producttype=1, category='Burgers', name='double')) == ['P4']
+    assert plus(browser, browser.query(prefix='M', name='CHEESE')) == ['M3']
+
+
+def test_name_only_filter_keeps_output_order():
+    browser = ResultBrowser(ROWS)
+    assert plus(browser, browser.query(name='cheese')) == ['P1', 'M3', 'P4']
+    assert plus(browser, browser.query()) == ['P1', 'P2', 'M3', 'P4', 'P5']
+
+
+def test_no_match_is_an_empty_single_page():
+    browser = ResultBrowser(ROWS)
+    for positions in (browser.query(category='Desserts'), browser.query(producttype=2, category='Burgers'),
+                      browser.query(name='pizza')):
+        assert list(positions) == []
+        assert browser.page_count(positions) == 1
+        assert browser.page(positions) == []
+
+
+def test_queries_are_memoised_case_insensitively():
+    browser = ResultBrowser(ROWS)
+    assert browser.query(category='Burgers', name='Cheese') is browser.query(category='Burgers', name='cheese')
+
+
+def test_pages_slice_the_positions():
+    browser = ResultBrowser(ROWS)
+    positions = browser.query(producttype=1)
+    assert browser.page_count(positions, page_size=2) == 2
+    assert [item['PLU'] for item in browser.page(positions, 1, page_size=2)] == ['P1', 'P2']
+    assert browser.page(positions, 2, page_size=2, columns=('PLU', 'Name')) == [
+        {'PLU': 'P4', 'Name': 'Double Cheese Burger'}, {'PLU': 'P5', 'Name': 'Soda'},
+    ]
+    assert browser.page(positions, 3, page_size=2) == []
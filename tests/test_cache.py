@@ -0,0 +1,31 @@
+from builders import export_file, image_file, product, product_export
+from tabesto_converter import ResultCache, run_conversion
+from tabesto_converter.cache import BROWSER_SIZE_FACTOR
+
+
+def upload(products):
+    export = product_export(product=[product(str(product_id), f'Product {product_id} ' * 20)
+                                     for product_id in range(products)])
+    return export_file(export).getvalue(), image_file().getvalue()
+
+
+def test_zip_counts_towards_max_bytes():
+    first, second = run_conversion(*upload(200)), run_conversion(*upload(201))
+    cache = ResultCache(max_bytes=first.size + second.size)
+    cache.put('first', first)
+    cache.put('second', second)
+    assert len(cache) == 2
+
+    archive = cache.zip_bytes(second, 'TAB_DLV_IMPORT_OUTPUT.tsv')
+    assert archive.startswith(b'PK')
+    assert second.size == len(second.tsv_bytes) * (BROWSER_SIZE_FACTOR + 1) + len(archive)
+    # The zip no longer fits next to the older entry
+    assert 'first' not in cache and 'second' in cache
+    assert cache.stats()['bytes'] == second.size
+
+
+def test_zip_is_built_once():
+    entry = run_conversion(*upload(10))
+    cache = ResultCache()
+    cache.put('key', entry)
+    assert cache.zip_bytes(entry, 'a.tsv') is cache.zip_bytes(entry, 'a.tsv')
@@ -0,0 +1,50 @@
+import pytest
+
+from builders import product, product_export, refs, texts
+from tabesto_converter import CATEGORY_POLICIES, convert
+
+
+def category(name, *product_ids):
+    return {'name': texts(name), 'products': refs(*product_ids)}
+
+
+def export(*categories):
+    products = [product(product_id, f'Product {product_id}') for product_id in ('1', '2', '3', '4')]
+    return product_export(product=products, category=list(categories))
+
+
+def categories_by_plu(product_export_data, policy):
+    result = convert(product_export_data, [], category_policy=policy)
+    return {row.PLU: row.Category for row in result.rows}
+
+
+MENU = export(
+    category('Burgers', '1', '2', '3'),
+    category('Specials', '3', '1'),
+    category('Burgers', '1'),
+)
+
+
+def test_first_policy_keeps_first_category_in_export_order():
+    assert categories_by_plu(MENU, 'first') == {'P1': 'Burgers', 'P2': 'Burgers', 'P3': 'Burgers', 'P4': ''}
+
+
+def test_all_policy_joins_every_category_once_in_export_order():
+    assert categories_by_plu(MENU, 'all') == {
+        'P1': 'Burgers,Specials', 'P2': 'Burgers', 'P3': 'Burgers,Specials', 'P4': '',
+    }
+
+
+def test_primary_policy_picks_category_listing_product_highest():
+    # P3 is third in Burgers but first in Specials; P1 is first in both, so the first category wins
+    assert categories_by_plu(MENU, 'primary') == {'P1': 'Burgers', 'P2': 'Burgers', 'P3': 'Specials', 'P4': ''}
+
+
+@pytest.mark.parametrize('policy', CATEGORY_POLICIES)
+def test_products_without_category_stay_blank(policy):
+    assert categories_by_plu(export(), policy) == {'P1': '', 'P2': '', 'P3': '', 'P4': ''}
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError, match='Unknown category policy'):
+        convert(MENU, [], category_policy='last')
@@ -0,0 +1,77 @@
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from builders import export_file, image_file, product, product_export, refs
+from tabesto_converter import load_exports, open_input, open_output, stream_exports
+
+PRODUCT_EXPORT = product_export(
+    product=[product('1', 'Burger', price=900, options=refs('7'))],
+    product_option=[{'id': '7', 'name': {'data': []}, 'choices': []}],
+)
+PRODUCT_BYTES = export_file(PRODUCT_EXPORT).getvalue()
+IMAGE_BYTES = image_file({'id': 12, 'url': 'https://cdn.example.com/burger.png'}).getvalue()
+
+
+def gzipped(data):
+    return gzip.compress(data)
+
+
+def zipped(data, name='export.json', extra=()):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for extra_name in extra:
+            archive.writestr(extra_name, b'' if extra_name.endswith('/') else b'metadata')
+        archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+COMPRESSIONS = {
+    'json': lambda data: data,
+    'json.gz': gzipped,
+    'zip': zipped,
+    'zip from macOS': lambda data: zipped(data, 'exports/export.json', extra=('exports/', '__MACOSX/._export.json')),
+}
+
+
+@pytest.mark.parametrize('read_exports', [load_exports, stream_exports])
+@pytest.mark.parametrize('compression', COMPRESSIONS)
+def test_compressed_exports_read_like_plain_json(tmp_path, read_exports, compression):
+    compress = COMPRESSIONS[compression]
+    expected = read_exports(io.BytesIO(PRODUCT_BYTES), io.BytesIO(IMAGE_BYTES))
+
+    # As file objects (uploads) ...
+    with open_input(io.BytesIO(compress(PRODUCT_BYTES))) as product_file, \
+            open_input(io.BytesIO(compress(IMAGE_BYTES))) as image_file:
+        assert read_exports(product_file, image_file) == expected
+
+    # ... and as paths, whatever their name
+    (tmp_path / 'PRODUCT').write_bytes(compress(PRODUCT_BYTES))
+    (tmp_path / 'IMAGE').write_bytes(compress(IMAGE_BYTES))
+    with open_input(str(tmp_path / 'PRODUCT')) as product_file, open_input(tmp_path / 'IMAGE') as image_file:
+        assert read_exports(product_file, image_file) == expected
+
+
+@pytest.mark.parametrize('names, found', [(('exports/', '__MACOSX/._export.json'), 0), (('a.json', 'b.json'), 2)])
+def test_zip_needs_exactly_one_file(names, found):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name in names:
+            archive.writestr(name, b'' if name.endswith('/') else PRODUCT_BYTES)
+    with pytest.raises(ValueError, match=f'found {found}'):
+        open_input(io.BytesIO(buffer.getvalue()))
+
+
+@pytest.mark.parametrize('file_name', ['out.tsv', 'out.tsv.gz', 'out.zip'])
+def test_outputs_read_back_through_open_input(tmp_path, file_name):
+    path = str(tmp_path / file_name)
+    with open_output(path, 'TAB_DLV_IMPORT_OUTPUT.tsv') as fp:
+        fp.write(b'PLU\tName\n')
+        fp.write(b'P1\tBurger\n')
+    with open_input(path) as fp:
+        assert fp.read() == b'PLU\tName\nP1\tBurger\n'
+    if file_name.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            assert archive.namelist() == ['TAB_DLV_IMPORT_OUTPUT.tsv']
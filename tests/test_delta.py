@@ -0,0 +1,83 @@
+import io
+
+import pytest
+
+from builders import export_file, image_file, product, product_export, refs, texts
+from tabesto_converter import LanguageConfig, TemplateLayoutError, convert, delta_from_exports, delta_from_tsv
+from tabesto_converter.writer import write_tsv
+
+
+def export(products, options=()):
+    return product_export(
+        product=[product(product_id, name, price=price, options=refs('7')) for product_id, name, price in products],
+        product_option=[{'id': option_id, 'name': texts(f'Option {option_id}')} for option_id in options],
+    )
+
+
+def menu_file(products, options=()):
+    return export_file(export(products, options))
+
+
+PREVIOUS = [('1', 'Burger', 900), ('2', 'Fries', 300), ('3', 'Soda', 250)]
+CURRENT = [('1', 'Burger', 950), ('2', 'Fries', 300), ('4', 'Water', 200)]
+
+
+def test_rows_are_classified_by_plu():
+    delta = delta_from_exports(menu_file(PREVIOUS), image_file(), menu_file(CURRENT), image_file())
+    assert delta.summary() == {'added': 1, 'changed': 1, 'removed': 1, 'unchanged': 1}
+    assert [row.PLU for row in delta.rows] == ['P1', 'P4']
+    assert delta.removed_plus == ['P3']
+
+
+def test_changed_subproduct_plu_changes_the_parent():
+    # P1 lists option 7, which only resolves to MG7 once the modifier group exists
+    delta = delta_from_exports(menu_file(PREVIOUS), image_file(), menu_file(PREVIOUS, options=['7']), image_file())
+    assert delta.summary() == {'added': 1, 'changed': 3, 'removed': 0, 'unchanged': 0}
+    assert [row.PLU for row in delta.rows] == ['P1', 'P2', 'P3', 'MG7']
+
+
+def test_same_export_has_an_empty_delta():
+    delta = delta_from_exports(menu_file(CURRENT), image_file(), menu_file(CURRENT), image_file())
+    assert delta.summary() == {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 3}
+    assert delta.rows == []
+
+
+def previous_template(products, languages=None):
+    result = convert(export(products), [], languages=languages)
+    tsv = io.BytesIO()
+    write_tsv(result.rows, tsv, languages=result.languages)
+    tsv.seek(0)
+    return tsv
+
+
+def test_previous_template_gives_the_same_delta_as_the_previous_export():
+    from_exports = delta_from_exports(menu_file(PREVIOUS), image_file(), menu_file(CURRENT), image_file())
+    from_tsv = delta_from_tsv(previous_template(PREVIOUS), menu_file(CURRENT), image_file())
+    assert from_tsv.summary() == from_exports.summary()
+    assert from_tsv.removed_plus == from_exports.removed_plus
+
+
+def test_template_with_other_columns_is_rejected():
+    tsv = previous_template(PREVIOUS, languages=LanguageConfig(('en_GB', 'fr_FR')))
+    with pytest.raises(TemplateLayoutError):
+        delta_from_tsv(tsv, menu_file(CURRENT), image_file())
+
+
+def test_previous_template_with_multi_line_descriptions():
+    products = [('1', 'Burger', 900), ('2', 'Fries', 300)]
+    menu = export(products)
+    menu['reference']['product'][0]['description'] = texts('Juicy\nbeef\r\nin a bun')
+    result = convert(menu, [])
+    tsv = io.BytesIO()
+    write_tsv(result.rows, tsv, languages=result.languages)
+    tsv.seek(0)
+
+    delta = delta_from_tsv(tsv, export_file(menu), image_file())
+    assert delta.summary() == {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 2}
+
+
+def test_template_row_with_extra_columns_is_rejected():
+    tsv = previous_template(PREVIOUS)
+    tsv = io.BytesIO(tsv.getvalue().replace(b'Fries', b'Fr\tes'))
+    with pytest.raises(TemplateLayoutError):
+        delta_from_tsv(tsv, menu_file(CURRENT), image_file())
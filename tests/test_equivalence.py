@@ -0,0 +1,52 @@
+import pytest
+
+from tabesto_converter.batch import Site
+from tabesto_converter.equivalence import ENGINE_RUNS, compare_exports, diff_tsv, format_equivalence, run_equivalence
+from tabesto_converter.synthetic import generate_menu_bytes
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_every_engine_run_matches_the_original_conversion(seed):
+    report = run_equivalence(sizes=(300,), seed=seed)
+    [result] = report['results']
+    assert [run['name'] for run in result['runs']] == [name for name, _, _ in ENGINE_RUNS]
+    assert report['identical'], [run['differences'] for run in result['runs'] if not run['identical']]
+
+
+def test_a_differing_run_is_reported_with_its_cells():
+    product_bytes, image_bytes = generate_menu_bytes(20)
+
+    def uppercase(product_bytes, image_bytes):
+        return ENGINE_RUNS[0][1](product_bytes, image_bytes).replace(b'Choose your option', b'CHOOSE')
+
+    result = compare_exports(product_bytes, image_bytes, 'broken', engine_runs=[('uppercase', uppercase, {})])
+    assert not result['identical']
+    [difference, *_] = result['runs'][0]['differences']
+    assert (difference['column'], difference['expected'], difference['actual']) == ('Name', 'Choose your option', 'CHOOSE')
+
+
+def test_diff_tsv_reports_missing_rows():
+    expected = b'PLU\tName\nP1\tA\nP2\tB\n'
+    assert diff_tsv(expected, b'PLU\tName\nP1\tA\n') == [
+        {'line': 3, 'plu': 'P2', 'column': None, 'expected': 'P2\tB', 'actual': None},
+    ]
+
+
+def test_a_failing_site_is_reported_and_the_others_still_run(tmp_path):
+    product_bytes, image_bytes = generate_menu_bytes(20)
+    (tmp_path / 'PRODUCT.json').write_bytes(product_bytes)
+    (tmp_path / 'IMAGE.json').write_bytes(image_bytes)
+    (tmp_path / 'BROKEN_PRODUCT.json').write_bytes(b'{"reference": ')
+    sites = [
+        Site('incomplete', str(tmp_path / 'PRODUCT.json'), None),
+        Site('broken', str(tmp_path / 'BROKEN_PRODUCT.json'), str(tmp_path / 'IMAGE.json')),
+        Site('good', str(tmp_path / 'PRODUCT.json'), str(tmp_path / 'IMAGE.json')),
+    ]
+
+    report = run_equivalence(sizes=(), sites=sites)
+    incomplete, broken, good = report['results']
+    assert not report['identical']
+    assert incomplete['error'].startswith('FileNotFoundError')
+    assert broken['error'].startswith('JSONDecodeError')
+    assert good['identical']
+    assert format_equivalence(report)[0] == f"{'incomplete':>20}: ❌ {incomplete['error']}"
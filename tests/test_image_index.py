@@ -0,0 +1,22 @@
+import pytest
+
+from builders import image_file
+from tabesto_converter.image_index import open_image_index
+
+IMAGE_EXPORT = image_file(
+    {'id': 12, 'url': 'https://cdn.example.com/burger.png'},
+    {'id': '12', 'url': 'https://cdn.example.com/fries.png'},
+).getvalue()
+
+
+@pytest.mark.parametrize('directory_name', ['images', 'c#1', 'c?x', 'c%41'])
+def test_index_opens_in_any_cache_directory(tmp_path, directory_name):
+    cache_dir = tmp_path / directory_name
+    index = open_image_index(IMAGE_EXPORT, cache_dir=str(cache_dir))
+    try:
+        assert len(index) == 2
+        assert index.get(12) != index.get('12')
+        assert index.get(13) == ''
+    finally:
+        index.close()
+    assert [path.name for path in tmp_path.iterdir()] == [directory_name]
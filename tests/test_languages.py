@@ -0,0 +1,42 @@
+import json
+
+from tabesto_converter.equivalence import compare_exports
+from tabesto_converter.languages import LanguageConfig
+
+
+def test_extract_returns_every_language_in_config_order():
+    field = {'data': [
+        {'lang': 'fr_FR', 'text': 'Frites'},
+        {'lang': 'en_GB', 'text': 'Fries'},
+        {'lang': 'en_GB', 'text': 'Chips'},
+    ]}
+    assert LanguageConfig().extract(field) == ('Frites', ('Fries', '', 'Frites'))
+
+
+def test_fallback_fills_missing_languages():
+    field = {'data': [{'lang': 'fr_FR', 'text': 'Frites'}]}
+    languages = LanguageConfig(('en_GB', 'fr_FR'), default='en_GB', fallback='fr_FR')
+    assert languages.extract(field) == ('Frites', ('Frites', 'Frites'))
+
+
+def test_null_and_missing_texts_are_blank():
+    field = {'data': [{'lang': 'en_GB', 'text': None}, {'lang': 'es_ES'}, {'lang': 'fr_FR', 'text': 'Frites'}]}
+    assert LanguageConfig().extract(field) == ('Frites', ('', '', 'Frites'))
+    assert LanguageConfig().extract({'data': [{'lang': 'fr_FR', 'text': None}]}) == ('', ('', '', ''))
+
+
+def test_null_texts_match_the_original_conversion():
+    def texts(**by_lang):
+        return {'data': [{'lang': lang, 'text': text} for lang, text in by_lang.items()]}
+
+    product_export = {'reference': {
+        'product': [
+            {'id': '1', 'name': texts(en_GB=None, fr_FR='Frites'), 'description': texts(es_ES=None)},
+            {'id': '10', 'name': texts(fr_FR=None), 'description': None},
+        ],
+        'meal_sequence': [{'id': '10', 'name': texts(en_GB=None, fr_FR='Menu'), 'items': []}],
+        'category': [{'name': texts(fr_FR=None), 'products': [{'reference_id': '1'}]}],
+        'product_option': [{'id': '7', 'name': texts(es_ES=None), 'choices': []}],
+    }}
+    result = compare_exports(json.dumps(product_export).encode(), b'{"pictures": []}', 'null texts')
+    assert result['identical'], result['differences']
@@ -0,0 +1,95 @@
+import io
+import os
+
+import pytest
+
+from builders import product, product_export
+from tabesto_converter import COMMON_FIELDS, Location, convert, read_locations, write_location_tsvs
+from tabesto_converter.locations import compile_location_renderer
+from tabesto_converter.rows import compile_line_renderer
+
+
+def convert_products(*names):
+    products = [product(str(position), name, price=450) for position, name in enumerate(names, 1)]
+    return convert(product_export(product=products), [])
+
+
+PARIS = Location('paris', 'Paris', 5.5, 10, 20)
+LYON = Location('lyon', 'Lyon')
+
+
+def expected_line(row, location):
+    # What a full render with the location's own constants gives
+    return compile_line_renderer(constants=dict(COMMON_FIELDS, **location.constants()))(row)
+
+
+def test_spliced_lines_match_a_full_render():
+    result = convert_products('Burger', 'Fries')
+    render = compile_location_renderer([PARIS, LYON])
+    for row in result.rows:
+        assert render(row) == [expected_line(row, PARIS), expected_line(row, LYON)]
+
+
+def test_placeholder_character_in_row_text_falls_back_to_a_full_render():
+    result = convert_products('Burger\x00Deluxe')
+    row = result.rows[0]
+    lines = compile_location_renderer([PARIS, LYON])(row)
+    assert lines == [expected_line(row, PARIS), expected_line(row, LYON)]
+    assert 'Burger\x00Deluxe\t' in lines[0]
+
+
+def test_price_override_only_changes_that_location_and_plu():
+    paris = Location('paris', 'Paris', prices={'P1': '3.90'})
+    result = convert_products('Burger', 'Fries')
+    render = compile_location_renderer([paris, LYON])
+    burger, fries = result.rows
+
+    paris_burger, lyon_burger = render(burger)
+    assert paris_burger.split('\t')[8] == '3.90'
+    assert lyon_burger.split('\t')[8] == '4.5'
+    assert burger.Price == 4.5
+    assert render(fries) == [expected_line(fries, paris), expected_line(fries, LYON)]
+
+
+def test_templates_are_written_per_location(tmp_path):
+    result = convert_products('Burger')
+    paths = write_location_tsvs(result.rows, [PARIS, LYON], str(tmp_path))
+    assert paths == [
+        str(tmp_path / 'paris' / 'TAB_DLV_IMPORT_OUTPUT.tsv'),
+        str(tmp_path / 'lyon' / 'TAB_DLV_IMPORT_OUTPUT.tsv'),
+    ]
+    with open(paths[0], 'rb') as fp:
+        lines = fp.read().decode('utf-8-sig').splitlines(keepends=True)
+    assert lines[1] == expected_line(result.rows[0], PARIS)
+
+
+@pytest.mark.parametrize('location_id', ['..', '../outside', '/etc', 'a/../../b', '.'])
+def test_unsafe_location_ids_stay_inside_the_output_directory(tmp_path, location_id):
+    output_dir = tmp_path / 'out'
+    [path] = write_location_tsvs(convert_products('Burger').rows, [Location(location_id, 'X')], str(output_dir))
+    assert os.path.dirname(os.path.dirname(os.path.realpath(path))) == os.path.realpath(output_dir)
+    assert os.path.exists(path)
+
+
+@pytest.mark.parametrize('location_ids', [('paris', 'paris'), ('a/b', 'a_b')])
+def test_locations_writing_to_the_same_directory_are_rejected(tmp_path, location_ids):
+    locations = [Location(location_id, location_id) for location_id in location_ids]
+    with pytest.raises(ValueError, match='unique'):
+        write_location_tsvs(convert_products('Burger').rows, locations, str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_read_locations_with_defaults_and_price_overrides():
+    locations_csv = io.StringIO('id,name,delivery_tax,takeaway_tax,eat_in_tax\nparis,Paris,5.5,,20\nlyon,,,,\n')
+    prices_csv = io.StringIO('location,plu,price\nparis,P1,3.90\n')
+    paris, lyon = read_locations(locations_csv, prices_csv)
+    assert paris.constants() == {
+        'LocationID': 'paris', 'LocationName': 'Paris', 'DeliveryTax': '5.5', 'TakeawayTax': 10, 'EatInTax': '20',
+    }
+    assert paris.prices == {'P1': '3.90'}
+    assert (lyon.name, lyon.prices) == ('lyon', {})
+
+
+def test_price_override_for_unknown_location_is_rejected():
+    with pytest.raises(ValueError, match='unknown location'):
+        read_locations(io.StringIO('id,name\nparis,Paris\n'), io.StringIO('location,plu,price\nlille,P1,3.90\n'))
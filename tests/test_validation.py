@@ -0,0 +1,96 @@
+import pytest
+
+from builders import product_export, refs, texts
+from tabesto_converter import ValidationError, convert
+from tabesto_converter.validation import DANGLING_REFERENCE, EMPTY_GROUP, MIN_MAX, OWN_PRODUCT, WRONG_TYPE_CHILD
+
+
+def menu(**reference):
+    reference.setdefault('product', [{'id': '1', 'name': texts('Burger'), 'options': refs('7')}])
+    reference.setdefault('product_option', [
+        {'id': '7', 'name': texts('Sauce'), 'choices': refs('70', '71'), 'min_required': 0, 'max_allowed': 1},
+    ])
+    reference.setdefault('product_option_choice', [
+        {'id': '70', 'name': texts('Ketchup')},
+        {'id': '71', 'name': texts('Mayo')},
+    ])
+    return product_export(**reference)
+
+
+def issues(product_export_data):
+    report = convert(product_export_data, [], validation='report').validation
+    return sorted((issue['kind'], issue['plu']) for issue in report.issues)
+
+
+def test_consistent_menu_has_no_issues():
+    report = convert(menu(), [], validation='report').validation
+    assert report.ok
+    assert report.rows_checked == 4
+    assert report.references_checked == 3
+
+
+def test_dangling_reference():
+    products = [{'id': '1', 'name': texts('Burger'), 'options': refs('7', '8')}]
+    assert issues(menu(product=products)) == [(DANGLING_REFERENCE, 'P1')]
+
+
+def test_wrong_type_child():
+    # '70' is a modifier, a product can only list modifier groups
+    products = [{'id': '1', 'name': texts('Burger'), 'options': refs('7', '70')}]
+    assert issues(menu(product=products)) == [(WRONG_TYPE_CHILD, 'P1')]
+
+
+def test_empty_groups():
+    options = [{'id': '7', 'name': texts('Sauce'), 'choices': []}]
+    suggestions = [{'id': '9', 'type': 'ADDITIONAL', 'name': texts('Drinks'), 'products': refs('404')}]
+    assert issues(menu(product_option=options, product_suggestion=suggestions)) == [
+        (DANGLING_REFERENCE, 'UG9'), (EMPTY_GROUP, 'MG7'), (EMPTY_GROUP, 'UG9'),
+    ]
+
+
+@pytest.mark.parametrize('min_required, max_allowed', [(2, 1), (-1, 1), ('one', 1), (3, 5)])
+def test_min_max_inconsistencies(min_required, max_allowed):
+    # The last case asks for 3 choices out of 2
+    options = [{'id': '7', 'name': texts('Sauce'), 'choices': refs('70', '71'),
+                'min_required': min_required, 'max_allowed': max_allowed}]
+    assert issues(menu(product_option=options)) == [(MIN_MAX, 'MG7')]
+
+
+def test_null_max_is_not_an_issue():
+    products = [{'id': '1', 'name': texts('Burger'), 'options': refs('7'),
+                 'modifier_groups': {'quantity_info': {'quantity': {'min_permitted': 0, 'max_permitted': None}}}}]
+    assert issues(menu(product=products)) == []
+
+
+def meal(meal_id, *product_ids):
+    return {'id': meal_id, 'name': texts(f'Menu {meal_id}'), 'items': [{'choices': refs(*product_ids)}]}
+
+
+def test_meal_offering_its_own_product_is_a_warning():
+    products = [{'id': '1', 'name': texts('Burger')}, {'id': '2', 'name': texts('Menu burger')}]
+    product_export_data = menu(product=products, meal_sequence=[meal('2', '1', '2')])
+    report = convert(product_export_data, [], validation='report').validation
+    assert [(issue['kind'], issue['detail']) for issue in report.issues] == [
+        (OWN_PRODUCT, '2-0 offers P2, the product of this meal'),
+    ]
+    assert report.ok
+    # Not an error: strict mode still converts
+    assert convert(product_export_data, [], validation='strict').validation.ok
+
+
+def test_meals_offering_each_other_are_not_an_issue():
+    # P1 and P2 only list modifier groups in the output, so nothing loops
+    products = [{'id': '1', 'name': texts('Menu A')}, {'id': '2', 'name': texts('Menu B')}]
+    assert issues(menu(product=products, meal_sequence=[meal('1', '2'), meal('2', '1')])) == []
+
+
+def test_meal_offering_other_products_is_not_an_issue():
+    products = [{'id': '1', 'name': texts('Burger')}, {'id': '2', 'name': texts('Menu burger')}]
+    assert issues(menu(product=products, meal_sequence=[meal('2', '1')])) == []
+
+
+def test_strict_mode_raises_before_returning_rows():
+    products = [{'id': '1', 'name': texts('Burger'), 'options': refs('8')}]
+    with pytest.raises(ValidationError) as raised:
+        convert(menu(product=products), [], validation='strict')
+    assert raised.value.report.counts()[DANGLING_REFERENCE] == 1